@@ -0,0 +1,311 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from review_index import tokenize
+from trustpilot_scraper import get_review_id, load_reviews_json
+
+# Configuration parameters
+CONFIG = {
+    # State
+    'default_state_file': 'duplicates.db',
+
+    # MinHash settings
+    'num_perm': 128,  # Signature length; must equal bands * rows_per_band
+    'bands': 32,
+    'rows_per_band': 4,  # 32 bands of 4 rows: candidate pairs start around 0.4 similarity
+    'shingle_size': 3,  # Words per shingle
+    'seed': 1,  # Must stay the same across runs so stored signatures remain comparable
+    'min_tokens': 8,  # Shorter reviews ("Great course!") are skipped as too generic to compare
+
+    # Reporting
+    'similarity_threshold': 0.7,  # Minimum estimated Jaccard similarity to report a pair
+    'min_stored_similarity': 0.3,  # Candidate pairs above this are kept, so later runs can use any threshold above it
+
+    # Parallelism
+    'workers': os.cpu_count() or 1,
+    'chunk_size': 500
+}
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+_permutations = None
+
+def get_permutations():
+    """Return the (a, b) coefficients of the hash permutations, generated once per process"""
+    global _permutations
+    if _permutations is None:
+        rng = np.random.RandomState(CONFIG['seed'])
+        a = rng.randint(1, int(MERSENNE_PRIME), size=CONFIG['num_perm'], dtype=np.uint64)
+        b = rng.randint(0, int(MERSENNE_PRIME), size=CONFIG['num_perm'], dtype=np.uint64)
+        _permutations = (a, b)
+    return _permutations
+
+def shingles(text):
+    """Return the set of word shingles for a review text, or None if it is too short to compare"""
+    tokens = tokenize(text)
+    if len(tokens) < CONFIG['min_tokens']:
+        return None
+    size = CONFIG['shingle_size']
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def compute_signature(text):
+    """Compute the MinHash signature of a review text as a uint32 array (None if too short)"""
+    review_shingles = shingles(text)
+    if not review_shingles:
+        return None
+    a, b = get_permutations()
+    hashes = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in review_shingles], dtype=np.uint64)
+    # Universal hashing (a*x + b) mod p, relying on uint64 wraparound like other MinHash implementations
+    with np.errstate(over='ignore'):
+        permuted = ((hashes[:, None] * a + b) % MERSENNE_PRIME) & MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+def compute_signatures(items):
+    """Compute signatures for a chunk of (review_id, text) pairs (runs in a worker process)"""
+    results = []
+    for review_id, text in items:
+        signature = compute_signature(text)
+        if signature is not None:
+            results.append((review_id, signature.tobytes()))
+    return results
+
+def band_buckets(signature):
+    """Return the LSH bucket key for each band of a signature"""
+    rows = CONFIG['rows_per_band']
+    raw = signature.tobytes()
+    width = rows * signature.itemsize
+    return [int.from_bytes(hashlib.blake2b(raw[band * width:(band + 1) * width], digest_size=8).digest(),
+                           'big', signed=True)
+            for band in range(CONFIG['bands'])]
+
+def open_state(state_file):
+    """Open (and create if needed) the signature and bucket store"""
+    conn = sqlite3.connect(state_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sources (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS signatures (
+            review_id TEXT PRIMARY KEY,
+            source_file TEXT NOT NULL,
+            signature BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS buckets (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            review_id TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);
+        CREATE TABLE IF NOT EXISTS pairs (
+            review_a TEXT NOT NULL,
+            review_b TEXT NOT NULL,
+            similarity REAL NOT NULL,
+            PRIMARY KEY (review_a, review_b)
+        );
+    """)
+    return conn
+
+def load_new_reviews(conn, inputs, force=False):
+    """Return ({review_id: (source_file, text)}, changed source files) for reviews not seen before"""
+    new_reviews = {}
+    changed_files = []
+    for path in inputs:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = conn.execute("SELECT mtime, size FROM sources WHERE path = ?", (path,)).fetchone()
+        if row and not force and row[0] == stat.st_mtime and row[1] == stat.st_size:
+            print(f"Skipping {path} (already processed)")
+            continue
+        changed_files.append(path)
+
+        for review in load_reviews_json(path):
+            review_id = get_review_id(review)
+            if review_id in new_reviews:
+                continue
+            if conn.execute("SELECT 1 FROM signatures WHERE review_id = ?", (review_id,)).fetchone():
+                continue
+            new_reviews[review_id] = (path, review.get('text', ''))
+    return new_reviews, changed_files
+
+def add_reviews(conn, new_reviews):
+    """Compute signatures for new reviews in parallel, bucket them and record similar pairs.
+
+    Each new review is only compared against reviews sharing at least one LSH
+    bucket with it, so the work grows with the number of new reviews rather
+    than with the square of the total. Every candidate pair above
+    min_stored_similarity is stored, whatever the current threshold.
+    Returns the number of new pairs at or above the similarity threshold.
+    """
+    items = [(review_id, text) for review_id, (_, text) in new_reviews.items()]
+    chunks = [items[i:i + CONFIG['chunk_size']] for i in range(0, len(items), CONFIG['chunk_size'])]
+
+    signatures = {}
+    if CONFIG['workers'] > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=CONFIG['workers']) as executor:
+            for results in executor.map(compute_signatures, chunks):
+                signatures.update(results)
+    else:
+        for chunk in chunks:
+            signatures.update(compute_signatures(chunk))
+    print(f"Computed {len(signatures)} signatures ({len(items) - len(signatures)} reviews too short to compare)")
+
+    signature_cache = {}
+
+    def get_signature(review_id):
+        if review_id not in signature_cache:
+            row = conn.execute("SELECT signature FROM signatures WHERE review_id = ?", (review_id,)).fetchone()
+            signature_cache[review_id] = np.frombuffer(row[0], dtype=np.uint32)
+        return signature_cache[review_id]
+
+    pairs_found = 0
+    with conn:
+        for review_id, raw_signature in signatures.items():
+            signature = np.frombuffer(raw_signature, dtype=np.uint32)
+            signature_cache[review_id] = signature
+            buckets = band_buckets(signature)
+
+            candidates = set()
+            for band, bucket in enumerate(buckets):
+                rows = conn.execute("SELECT review_id FROM buckets WHERE band = ? AND bucket = ?", (band, bucket))
+                candidates.update(row[0] for row in rows)
+
+            for candidate in candidates:
+                similarity = float(np.mean(signature == get_signature(candidate)))
+                if similarity >= CONFIG['min_stored_similarity']:
+                    review_a, review_b = sorted((review_id, candidate))
+                    conn.execute("INSERT OR REPLACE INTO pairs VALUES (?, ?, ?)", (review_a, review_b, similarity))
+                if similarity >= CONFIG['similarity_threshold']:
+                    pairs_found += 1
+
+            conn.execute("INSERT INTO signatures VALUES (?, ?, ?)",
+                         (review_id, new_reviews[review_id][0], raw_signature))
+            conn.executemany("INSERT INTO buckets VALUES (?, ?, ?)",
+                             [(band, bucket, review_id) for band, bucket in enumerate(buckets)])
+    return pairs_found
+
+def find_clusters(conn, threshold):
+    """Group pairs with at least the given similarity into clusters with union-find.
+
+    Returns {review_id: (cluster_id, best similarity to another member)}; the
+    cluster ID is the smallest review ID in the cluster so it stays stable
+    across runs unless clusters merge.
+    """
+    parent = {}
+
+    def find(review_id):
+        parent.setdefault(review_id, review_id)
+        while parent[review_id] != review_id:
+            parent[review_id] = parent[parent[review_id]]
+            review_id = parent[review_id]
+        return review_id
+
+    best_similarity = {}
+    for review_a, review_b, similarity in conn.execute(
+            "SELECT review_a, review_b, similarity FROM pairs WHERE similarity >= ?", (threshold,)):
+        root_a, root_b = find(review_a), find(review_b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+        for review_id in (review_a, review_b):
+            best_similarity[review_id] = max(best_similarity.get(review_id, 0.0), similarity)
+
+    return {review_id: (find(review_id), best_similarity[review_id]) for review_id in parent}
+
+def annotate_files(paths, clusters):
+    """Write duplicate_cluster/duplicate_similarity into the metadata of each review in the JSON files"""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for review in data['reviews']:
+            metadata = review.setdefault('metadata', {})
+            cluster = clusters.get(get_review_id(review))
+            if cluster:
+                metadata['duplicate_cluster'] = cluster[0]
+                metadata['duplicate_similarity'] = round(cluster[1], 3)
+            else:
+                metadata.pop('duplicate_cluster', None)
+                metadata.pop('duplicate_similarity', None)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"Annotated {path}")
+
+def print_report(conn, clusters):
+    """Print each cluster with its members, sources and similarity scores"""
+    members = {}
+    for review_id, (cluster_id, similarity) in clusters.items():
+        members.setdefault(cluster_id, []).append((review_id, similarity))
+
+    sources = {}
+    for review_id, source_file in conn.execute("SELECT review_id, source_file FROM signatures"):
+        if review_id in clusters:
+            sources[review_id] = source_file
+
+    for cluster_id, cluster_members in sorted(members.items(), key=lambda item: -len(item[1])):
+        print(f"Cluster {cluster_id}: {len(cluster_members)} reviews")
+        for review_id, similarity in sorted(cluster_members, key=lambda member: -member[1]):
+            print(f"  {review_id}  similarity {similarity:.2f}  ({sources.get(review_id, 'unknown source')})")
+    print(f"Found {len(members)} clusters covering {len(clusters)} reviews")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Detect near-duplicate reviews across Trustpilot scrape outputs')
+    parser.add_argument('inputs', nargs='*', help='JSON files written by trustpilot_scraper.py')
+    parser.add_argument('--state', default=CONFIG['default_state_file'],
+                        help=f'File storing signatures and buckets between runs (default: {CONFIG["default_state_file"]})')
+    parser.add_argument('--annotate', action='store_true',
+                        help='Write duplicate cluster IDs into the reviews of the affected JSON files')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-read input files even if they are unchanged since the last run')
+    parser.add_argument('--workers', type=int,
+                        help=f'Number of processes used to compute signatures (default: {CONFIG["workers"]})')
+    parser.add_argument('--threshold', type=float,
+                        help=f'Minimum similarity to report (default: {CONFIG["similarity_threshold"]})')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.workers:
+        CONFIG['workers'] = args.workers
+    if args.threshold is not None:
+        CONFIG['similarity_threshold'] = args.threshold
+        if args.threshold < CONFIG['min_stored_similarity']:
+            print(f"Note: only pairs with similarity of at least {CONFIG['min_stored_similarity']} are stored")
+
+    conn = open_state(args.state)
+    try:
+        new_reviews, changed_files = load_new_reviews(conn, args.inputs, args.force)
+        print(f"Found {len(new_reviews)} new reviews in {len(changed_files)} files")
+        pairs_found = add_reviews(conn, new_reviews)
+        print(f"Found {pairs_found} new similar pairs")
+
+        clusters = find_clusters(conn, CONFIG['similarity_threshold'])
+        print_report(conn, clusters)
+
+        if args.annotate:
+            # Re-annotate the new files plus any earlier file sharing a cluster with a new review
+            new_clusters = {clusters[review_id][0] for review_id in new_reviews if review_id in clusters}
+            affected = {review_id for review_id, (cluster_id, _) in clusters.items() if cluster_id in new_clusters}
+            paths = set(changed_files)
+            for review_id, source_file in conn.execute("SELECT review_id, source_file FROM signatures"):
+                if review_id in affected:
+                    paths.add(source_file)
+            annotate_files(sorted(paths), clusters)
+            changed_files = sorted(paths)
+
+        # Record the processed files last so annotated files aren't re-read next run
+        with conn:
+            for path in changed_files:
+                stat = os.stat(path)
+                conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (path, stat.st_mtime, stat.st_size))
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import json
 import argparse
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
+from matplotlib.colors import to_hex
 import seaborn as sns
 import numpy as np
+import pyarrow.parquet as pq
 
 # Configuration parameters
 CONFIG = {
@@ -17,11 +19,227 @@ CONFIG = {
     'dpi': 300,
     'y_axis_limit': 5.2,
     'legend_position': (1.15, 1),
-    'legend_fontsize': 10
+    'legend_fontsize': 10,
+    
+    # HTML chart settings
+    'html_max_trend_points': 500,  # Trend line is downsampled to at most this many points
+    'html_max_bars': 150,  # Adjacent buckets are merged to keep at most this many bars
+    'html_granularities': ['day', 'week', 'month']
+}
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  body { font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; margin: 24px; color: #222; }
+  h2 { font-size: 16px; margin: 24px 0 8px; }
+  canvas { width: 100%; height: 320px; display: block; border: 1px solid #eee; }
+  .controls { margin-bottom: 8px; }
+  .legend span { display: inline-block; margin-right: 14px; font-size: 13px; }
+  .legend i { display: inline-block; width: 12px; height: 12px; margin-right: 4px; vertical-align: -1px; }
+  #tooltip { position: fixed; pointer-events: none; background: rgba(0, 0, 0, 0.8); color: #fff;
+             padding: 4px 8px; border-radius: 3px; font-size: 12px; display: none; white-space: pre; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<div class="controls">
+  Granularity:
+  <select id="granularity">
+    <option value="day">Day</option>
+    <option value="week">Week</option>
+    <option value="month">Month</option>
+  </select>
+  <span id="summary"></span>
+</div>
+<h2>Average Rating Trend Over Time</h2>
+<canvas id="trend"></canvas>
+<h2>Rating Distribution Over Time</h2>
+<div class="legend" id="legend"></div>
+<canvas id="distribution"></canvas>
+<div id="tooltip"></div>
+<script>
+const DATA = __DATA__;
+const PAD = {left: 48, right: 16, top: 12, bottom: 36};
+const tooltip = document.getElementById('tooltip');
+const select = document.getElementById('granularity');
+
+function setupCanvas(canvas) {
+  const ratio = window.devicePixelRatio || 1;
+  canvas.width = canvas.clientWidth * ratio;
+  canvas.height = canvas.clientHeight * ratio;
+  const ctx = canvas.getContext('2d');
+  ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+  ctx.clearRect(0, 0, canvas.clientWidth, canvas.clientHeight);
+  ctx.font = '11px sans-serif';
+  return {ctx: ctx, width: canvas.clientWidth - PAD.left - PAD.right, height: canvas.clientHeight - PAD.top - PAD.bottom};
+}
+
+function drawAxes(ctx, width, height, yMax, yTicks, xLabels) {
+  ctx.strokeStyle = '#ddd';
+  ctx.fillStyle = '#555';
+  ctx.textAlign = 'right';
+  yTicks.forEach(function (value) {
+    const y = PAD.top + height - value / yMax * height;
+    ctx.beginPath(); ctx.moveTo(PAD.left, y); ctx.lineTo(PAD.left + width, y); ctx.stroke();
+    ctx.fillText(String(value), PAD.left - 6, y + 4);
+  });
+  ctx.textAlign = 'center';
+  xLabels.forEach(function (label) {
+    ctx.fillText(label.text, label.x, PAD.top + height + 16);
+  });
+}
+
+function tickLabels(items, xFor, width) {
+  // Label at most one tick per ~90px regardless of how many points there are
+  const count = Math.max(1, Math.floor(width / 90));
+  const step = Math.max(1, Math.ceil(items.length / count));
+  const labels = [];
+  for (let i = 0; i < items.length; i += step) {
+    labels.push({x: xFor(i), text: items[i].label});
+  }
+  return labels;
+}
+
+function drawEmpty(canvas, c) {
+  c.ctx.fillStyle = '#888';
+  c.ctx.textAlign = 'center';
+  c.ctx.fillText('No reviews to show', PAD.left + c.width / 2, PAD.top + c.height / 2);
+  canvas.onmousemove = null;
+}
+
+function drawTrend(view) {
+  const canvas = document.getElementById('trend');
+  const c = setupCanvas(canvas);
+  const points = view.trend;
+  if (points.length === 0) { drawEmpty(canvas, c); return; }
+  const first = points[0].t;
+  const span = points.length > 1 ? points[points.length - 1].t - first : 1;
+  const xFor = function (i) { return PAD.left + (points[i].t - first) / span * c.width; };
+  const yFor = function (value) { return PAD.top + c.height - value / DATA.y_max * c.height; };
+  drawAxes(c.ctx, c.width, c.height, DATA.y_max, [1, 2, 3, 4, 5], tickLabels(points, xFor, c.width));
+
+  c.ctx.strokeStyle = DATA.line_color;
+  c.ctx.lineWidth = 2;
+  c.ctx.beginPath();
+  points.forEach(function (point, i) {
+    if (i === 0) { c.ctx.moveTo(xFor(i), yFor(point.avg)); } else { c.ctx.lineTo(xFor(i), yFor(point.avg)); }
+  });
+  c.ctx.stroke();
+  c.ctx.lineTo(xFor(points.length - 1), yFor(0));
+  c.ctx.lineTo(xFor(0), yFor(0));
+  c.ctx.globalAlpha = 0.2;
+  c.ctx.fillStyle = DATA.line_color;
+  c.ctx.fill();
+  c.ctx.globalAlpha = 1;
+
+  canvas.onmousemove = function (event) {
+    const x = event.offsetX;
+    let best = -1, bestDistance = Infinity;
+    points.forEach(function (point, i) {
+      const distance = Math.abs(xFor(i) - x);
+      if (distance < bestDistance) { best = i; bestDistance = distance; }
+    });
+    if (best < 0) { return; }
+    showTooltip(event, points[best].label + '\\nAverage: ' + points[best].avg.toFixed(2) + '\\nReviews: ' + points[best].n);
+  };
 }
 
+function drawDistribution(view) {
+  const canvas = document.getElementById('distribution');
+  const c = setupCanvas(canvas);
+  const bars = view.bars;
+  if (bars.length === 0) { drawEmpty(canvas, c); return; }
+  const yMax = Math.max(1, Math.max.apply(null, bars.map(function (bar) { return bar.n; }))) * 1.1;
+  const slot = c.width / Math.max(1, bars.length);
+  const xFor = function (i) { return PAD.left + (i + 0.5) * slot; };
+  const ticks = [0, 0.25, 0.5, 0.75, 1].map(function (f) { return Math.round(f * yMax / 1.1); });
+  drawAxes(c.ctx, c.width, c.height, yMax, ticks.filter(function (v, i) { return ticks.indexOf(v) === i; }),
+           tickLabels(bars, xFor, c.width));
+
+  bars.forEach(function (bar, i) {
+    let bottom = 0;
+    bar.counts.forEach(function (count, star) {
+      if (!count) { return; }
+      const top = bottom + count;
+      c.ctx.fillStyle = DATA.star_colors[star];
+      c.ctx.fillRect(PAD.left + i * slot + slot * 0.1, PAD.top + c.height - top / yMax * c.height,
+                     Math.max(1, slot * 0.8), count / yMax * c.height);
+      bottom = top;
+    });
+    // Totals are only drawn when there is room for them
+    if (slot >= 18) {
+      c.ctx.fillStyle = '#333';
+      c.ctx.textAlign = 'center';
+      c.ctx.fillText(String(bar.n), xFor(i), PAD.top + c.height - bar.n / yMax * c.height - 4);
+    }
+  });
+
+  canvas.onmousemove = function (event) {
+    const i = Math.floor((event.offsetX - PAD.left) / slot);
+    if (i < 0 || i >= bars.length) { tooltip.style.display = 'none'; return; }
+    const bar = bars[i];
+    const lines = [bar.range, 'Total: ' + bar.n];
+    for (let star = 5; star >= 1; star--) { lines.push(star + '-star: ' + bar.counts[star - 1]); }
+    showTooltip(event, lines.join('\\n'));
+  };
+}
+
+function showTooltip(event, text) {
+  tooltip.textContent = text;
+  tooltip.style.left = (event.clientX + 12) + 'px';
+  tooltip.style.top = (event.clientY + 12) + 'px';
+  tooltip.style.display = 'block';
+}
+
+function render() {
+  const view = DATA.views[select.value];
+  document.getElementById('summary').textContent =
+    view.buckets + ' ' + select.value + ' buckets, showing ' + view.trend.length + ' trend points and ' +
+    view.bars.length + ' bars';
+  drawTrend(view);
+  drawDistribution(view);
+}
+
+document.getElementById('legend').innerHTML = DATA.star_colors.map(function (color, i) {
+  return '<span><i style="background:' + color + '"></i>' + (i + 1) + '-star</span>';
+}).join('');
+['trend', 'distribution'].forEach(function (id) {
+  document.getElementById(id).onmouseleave = function () { tooltip.style.display = 'none'; };
+});
+select.value = DATA.default_granularity;
+select.onchange = render;
+window.onresize = render;
+render();
+</script>
+</body>
+</html>
+"""
+
+def load_ratings(input_file):
+    """Load (published datetime, star rating) pairs from a JSON or Parquet review file"""
+    if input_file.endswith('.parquet'):
+        # Only read the two columns we plot, skipping the review text
+        table = pq.read_table(input_file, columns=['date_published', 'stars'])
+        dates = table.column('date_published').to_pylist()
+        stars = table.column('stars').to_pylist()
+        return [(dt, rating) for dt, rating in zip(dates, stars) if dt is not None and rating is not None]
+    
+    # Load JSON data from file
+    with open(input_file, 'r') as f:
+        data = json.load(f)
+
+    ratings = []
+    for review in data['reviews']:
+        date_str = review['date']['published']
+        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        ratings.append((dt, review['stars']))
+    return ratings
+
 def generate_graph(input_file=None, output_file=None):
-    """Generate review analysis graphs from JSON data"""
+    """Generate review analysis graphs from JSON or Parquet data"""
     # Use defaults if not specified
     input_file = input_file or CONFIG['default_input_file']
     output_file = output_file or CONFIG['default_output_file']
@@ -30,18 +248,12 @@ def generate_graph(input_file=None, output_file=None):
     plt.style.use('seaborn-v0_8')  # Updated style name for compatibility
     sns.set(style="whitegrid")  # Use seaborn's set function instead
 
-    # Load JSON data from file
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    reviews = data['reviews']
+    # Load review dates and ratings from file
+    ratings = load_ratings(input_file)
 
     # Process reviews: group by year and month
     monthly_data = defaultdict(lambda: {'ratings': [], 'counts': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}})
-    for review in reviews:
-        date_str = review['date']['published']
-        rating = review['stars']
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    for dt, rating in ratings:
         year, month = dt.year, dt.month
         monthly_data[(year, month)]['ratings'].append(rating)
         monthly_data[(year, month)]['counts'][rating] += 1
@@ -117,15 +329,132 @@ def generate_graph(input_file=None, output_file=None):
     # Show the figure
     plt.show()
 
+def bucket_start(dt, granularity):
+    """Return the first day of the day/week/month bucket containing a datetime"""
+    day = dt.date()
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def bucket_label(start, granularity):
+    """Format a bucket start date for display"""
+    return start.strftime('%Y-%m') if granularity == 'month' else start.isoformat()
+
+def aggregate_ratings(ratings, granularity):
+    """Group ratings into chronologically sorted (bucket start, counts per star) pairs"""
+    buckets = defaultdict(lambda: [0, 0, 0, 0, 0])
+    for dt, rating in ratings:
+        buckets[bucket_start(dt, granularity)][rating - 1] += 1
+    return sorted(buckets.items())
+
+def downsample_lttb(x, y, threshold):
+    """Return the indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    
+    The first and last points are always kept; every other kept point is the one
+    in its bucket forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves peaks and dips in the trend.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    
+    indices = [0]
+    every = (n - 2) / (threshold - 2)
+    previous = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        # Point in the current bucket with the largest triangle area
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        areas = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        indices.append(previous)
+    indices.append(n - 1)
+    return indices
+
+def build_html_view(ratings, granularity):
+    """Pre-aggregate ratings at one granularity into a downsampled trend line and bar list"""
+    buckets = aggregate_ratings(ratings, granularity)
+    totals = np.array([sum(counts) for _, counts in buckets], dtype=float)
+    averages = np.array([sum((star + 1) * count for star, count in enumerate(counts)) for _, counts in buckets],
+                        dtype=float) / totals
+    days = np.array([start.toordinal() for start, _ in buckets], dtype=float)
+    
+    trend = [{'t': int(days[i]), 'label': bucket_label(buckets[i][0], granularity),
+              'avg': round(float(averages[i]), 3), 'n': int(totals[i])}
+             for i in downsample_lttb(days, averages, CONFIG['html_max_trend_points'])]
+    
+    # Merge adjacent buckets so the number of bars stays bounded
+    group_size = max(1, -(-len(buckets) // CONFIG['html_max_bars']))
+    bars = []
+    for i in range(0, len(buckets), group_size):
+        group = buckets[i:i + group_size]
+        counts = [sum(bucket_counts[star] for _, bucket_counts in group) for star in range(5)]
+        first_label = bucket_label(group[0][0], granularity)
+        last_label = bucket_label(group[-1][0], granularity)
+        bars.append({'label': first_label,
+                     'range': first_label if len(group) == 1 else f"{first_label} to {last_label}",
+                     'counts': counts, 'n': sum(counts)})
+    
+    return {'buckets': len(buckets), 'trend': trend, 'bars': bars}
+
+def generate_html_chart(input_file=None, output_file=None):
+    """Generate an interactive HTML chart with pre-aggregated, downsampled data.
+    
+    Data is embedded at day, week and month granularity with the trend line
+    downsampled and bars merged, so the browser draws a bounded number of
+    points however long the review history is.
+    """
+    input_file = input_file or CONFIG['default_input_file']
+    output_file = output_file or CONFIG['default_output_file']
+    
+    ratings = load_ratings(input_file)
+    views = {granularity: build_html_view(ratings, granularity) for granularity in CONFIG['html_granularities']}
+    
+    # Default to the finest granularity that doesn't need its bars merged
+    default_granularity = CONFIG['html_granularities'][-1]
+    for granularity in CONFIG['html_granularities']:
+        if views[granularity]['buckets'] <= CONFIG['html_max_bars']:
+            default_granularity = granularity
+            break
+    
+    colors = sns.color_palette("viridis", 5)
+    colors.reverse()  # Match the PNG output (5-star at bottom)
+    data = {
+        'views': views,
+        'default_granularity': default_granularity,
+        'y_max': CONFIG['y_axis_limit'],
+        'line_color': to_hex(sns.color_palette()[0]),
+        'star_colors': [to_hex(color) for color in colors]
+    }
+    
+    # Escape '</' so review data can't close the script tag
+    html = HTML_TEMPLATE.replace('__DATA__', json.dumps(data).replace('</', '<\\/'))
+    html = html.replace('__TITLE__', f"Review Analysis ({len(ratings)} reviews)")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"Chart saved to {output_file}")
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Generate graphs from Trustpilot review data')
-    parser.add_argument('-i', '--input', help=f'Input JSON file (default: {CONFIG["default_input_file"]})')
-    parser.add_argument('-o', '--output', help=f'Output image file (default: {CONFIG["default_output_file"]})')
+    parser.add_argument('-i', '--input', help=f'Input JSON or Parquet file (default: {CONFIG["default_input_file"]})')
+    parser.add_argument('-o', '--output', help=f'Output image file, or .html for an interactive chart (default: {CONFIG["default_output_file"]})')
     return parser.parse_args()
 
 def main():
     args = parse_args()
-    generate_graph(args.input, args.output)
+    if args.output and args.output.endswith('.html'):
+        generate_html_chart(args.input, args.output)
+    else:
+        generate_graph(args.input, args.output)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,330 @@
+import argparse
+import json
+import sqlite3
+import time
+from trustpilot_scraper import (
+    CONFIG as SCRAPER_CONFIG, SelectorCache, create_driver, get_review_id, parse_published_date, quit_driver,
+    scrape_page, update_config_from_args
+)
+
+# Configuration parameters
+CONFIG = {
+    # State and output
+    'default_state_file': 'monitor.db',
+    'default_sink': 'new_reviews.jsonl',
+
+    # Polling schedule
+    'min_poll_interval': 300,  # Never poll a company more often than every 5 minutes
+    'max_poll_interval': 86400,  # ...or less often than once a day
+    'initial_poll_interval': 3600,  # Used until a company's review rate is known
+    'target_new_per_poll': 3,  # Aim for about this many new reviews per poll
+    'rate_smoothing': 0.3,  # Weight of the latest observation in the review rate average
+
+    # Page loading
+    'max_pages_per_poll': 5,  # Pages to follow during a burst before giving up on reaching a known review
+    'sort_param': 'sort=recency',  # Newest reviews first, so known reviews are reached quickly
+    'max_sleep': 60  # Longest single sleep, so the schedule picks up companies added in the meantime
+}
+
+class JsonlSink:
+    """Appends new reviews to a JSON Lines file"""
+
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, company_url, reviews):
+        for review_id, review in reviews:
+            self.file.write(json.dumps({'company_url': company_url, 'review_id': review_id, 'review': review},
+                                       ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SqliteSink:
+    """Inserts new reviews into a SQLite table"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS reviews (
+                                 review_id TEXT PRIMARY KEY,
+                                 company_url TEXT NOT NULL,
+                                 seen_at REAL NOT NULL,
+                                 review TEXT NOT NULL
+                             )""")
+
+    def write(self, company_url, reviews):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?)",
+                                  [(review_id, company_url, now, json.dumps(review, ensure_ascii=False))
+                                   for review_id, review in reviews])
+
+    def close(self):
+        self.conn.close()
+
+def open_sink(path):
+    """Open a JSONL or SQLite sink depending on the file extension"""
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SqliteSink(path)
+    return JsonlSink(path)
+
+def open_state(state_file):
+    """Open (and create if needed) the monitor's schedule and seen-review store"""
+    conn = sqlite3.connect(state_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS companies (
+            url TEXT PRIMARY KEY,
+            next_poll REAL NOT NULL,
+            last_poll REAL,
+            rate REAL,  -- Estimated new reviews per second
+            interval REAL NOT NULL,
+            polls INTEGER NOT NULL DEFAULT 0,
+            page_loads INTEGER NOT NULL DEFAULT 0,
+            new_reviews INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS seen (
+            url TEXT NOT NULL,
+            review_id TEXT NOT NULL,
+            PRIMARY KEY (url, review_id)
+        ) WITHOUT ROWID;
+    """)
+    return conn
+
+def monitor_url(url):
+    """Return the URL to poll for a company, sorted newest first"""
+    if CONFIG['sort_param'] in url:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}{CONFIG['sort_param']}"
+
+def add_companies(conn, urls):
+    """Start tracking companies; ones that are already tracked keep their schedule"""
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO companies (url, next_poll, interval) VALUES (?, ?, ?)",
+                         [(monitor_url(url), time.time(), CONFIG['initial_poll_interval']) for url in urls])
+
+def poll_company(driver, selector_cache, conn, url, first_poll):
+    """Load pages newest first until a known review is reached.
+
+    The first poll of a company only loads page 1, which becomes the baseline.
+    Returns (status, list of (review_id, review) not seen before, number of page loads);
+    status is 'failed' if any page failed to load, in which case the reviews should be
+    discarded so they are picked up again by the next poll.
+    """
+    new_reviews = []
+    new_ids = set()
+    page_loads = 0
+    max_pages = 1 if first_poll else CONFIG['max_pages_per_poll']
+
+    for page_num in range(1, max_pages + 1):
+        if page_num > 1:
+            time.sleep(SCRAPER_CONFIG['page_delay'])  # Delay between pages to be polite
+        status, reviews = scrape_page(driver, selector_cache, url, page_num)
+        page_loads += 1
+        if status == 'failed':
+            return 'failed', [], page_loads
+        if status != 'loaded':
+            break
+
+        reached_known = False
+        for review in reviews:
+            review_id = get_review_id(review)
+            if review_id in new_ids:
+                continue
+            if conn.execute("SELECT 1 FROM seen WHERE url = ? AND review_id = ?", (url, review_id)).fetchone():
+                reached_known = True
+                continue
+            new_ids.add(review_id)
+            new_reviews.append((review_id, review))
+
+        if reached_known or len(reviews) < SCRAPER_CONFIG['reviews_per_page']:
+            break
+
+    return 'loaded', new_reviews, page_loads
+
+def estimate_rate(previous_rate, last_poll, now, new_reviews):
+    """Update a company's review arrival rate (reviews per second) after a poll.
+
+    On the first poll the rate is estimated from the publish dates on page 1;
+    afterwards it is a moving average of new reviews per second between polls.
+    """
+    if last_poll is None:
+        timestamps = sorted(dt.timestamp() for dt in
+                            (parse_published_date(review['date']['published']) for _, review in new_reviews)
+                            if dt is not None)
+        if len(timestamps) < 2 or timestamps[-1] <= timestamps[0]:
+            return None
+        return (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+    observed = len(new_reviews) / max(now - last_poll, 1)
+    if previous_rate is None:
+        return observed
+    return CONFIG['rate_smoothing'] * observed + (1 - CONFIG['rate_smoothing']) * previous_rate
+
+def next_interval(rate):
+    """Choose the time until the next poll so about target_new_per_poll reviews have arrived"""
+    if rate is None:
+        return CONFIG['initial_poll_interval']
+    if rate <= 0:
+        return CONFIG['max_poll_interval']
+    interval = CONFIG['target_new_per_poll'] / rate
+    return min(max(interval, CONFIG['min_poll_interval']), CONFIG['max_poll_interval'])
+
+def record_poll(conn, url, rate, new_reviews, page_loads, now, emitted):
+    """Mark new reviews as seen and schedule the company's next poll.
+
+    emitted is the number of reviews written to the sink, which is less than
+    len(new_reviews) when a baseline is recorded without being emitted.
+    """
+    interval = next_interval(rate)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?)",
+                         [(url, review_id) for review_id, _ in new_reviews])
+        conn.execute("""UPDATE companies
+                        SET last_poll = ?, rate = ?, interval = ?, next_poll = ?, polls = polls + 1,
+                            page_loads = page_loads + ?, new_reviews = new_reviews + ?
+                        WHERE url = ?""",
+                     (now, rate, interval, now + interval, page_loads, emitted, url))
+    return interval
+
+def run_monitor(conn, sink, once=False, emit_baseline=False):
+    """Poll companies as they become due until interrupted (or, with once, until each due company is polled).
+
+    A company's first poll only records page 1 as seen; its reviews are written
+    to the sink as well if emit_baseline is set.
+    """
+    driver = None
+    selector_cache = SelectorCache()
+    polled = set()
+    try:
+        while True:
+            row = conn.execute("SELECT url, next_poll, last_poll, rate FROM companies "
+                               "ORDER BY next_poll LIMIT 1").fetchone()
+            if row is None:
+                print("No companies to monitor")
+                return
+            url, next_poll, last_poll, rate = row
+
+            now = time.time()
+            if next_poll > now:
+                if once:
+                    return
+                time.sleep(min(next_poll - now, CONFIG['max_sleep']))
+                continue
+            if once and url in polled:
+                return
+
+            if driver is None:
+                driver = create_driver()
+            first_poll = last_poll is None
+            try:
+                status, new_reviews, page_loads = poll_company(driver, selector_cache, conn, url, first_poll)
+            except Exception as e:
+                print(f"Error polling {url}: {e}")
+                status, new_reviews, page_loads = 'failed', [], 1
+
+            if status == 'failed':
+                # Start a fresh browser next time in case this one has died; a dead
+                # browser shows up as a failed page load rather than an exception
+                quit_driver(driver)
+                driver = None
+                # Retry soon without counting the failed poll towards the review rate. last_poll
+                # is left alone, so a failed first poll still takes the baseline next time
+                with conn:
+                    conn.execute("UPDATE companies SET next_poll = ?, page_loads = page_loads + ? WHERE url = ?",
+                                 (time.time() + CONFIG['min_poll_interval'], page_loads, url))
+                polled.add(url)
+                print(f"{url}: poll failed, retrying in {CONFIG['min_poll_interval'] / 60:.0f} minutes")
+                continue
+
+            now = time.time()
+            emitted = new_reviews if emit_baseline or not first_poll else []
+            if emitted:
+                sink.write(url, emitted)
+            rate = estimate_rate(rate, last_poll, now, new_reviews)
+            interval = record_poll(conn, url, rate, new_reviews, page_loads, now, len(emitted))
+            polled.add(url)
+            rate_text = f"{rate * 86400:.1f} reviews/day" if rate is not None else "unknown rate"
+            if first_poll and not emit_baseline:
+                found_text = f"baseline of {len(new_reviews)} reviews"
+            else:
+                found_text = f"{len(new_reviews)} new reviews"
+            print(f"{url}: {found_text} from {page_loads} page loads, "
+                  f"{rate_text}, next poll in {interval / 60:.0f} minutes")
+    finally:
+        if driver is not None:
+            quit_driver(driver)
+        selector_cache.print_summary()
+
+def print_summary(conn):
+    """Print each company's schedule and totals"""
+    for url, rate, interval, polls, page_loads, new_reviews in conn.execute(
+            "SELECT url, rate, interval, polls, page_loads, new_reviews FROM companies ORDER BY url"):
+        rate_text = f"{rate * 86400:.1f} reviews/day" if rate is not None else "unknown rate"
+        print(f"{url}: {polls} polls, {page_loads} page loads, {new_reviews} new reviews, "
+              f"{rate_text}, polling every {interval / 60:.0f} minutes")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Continuously monitor Trustpilot companies for new reviews')
+    parser.add_argument('urls', nargs='*', help='URLs of Trustpilot review pages to start monitoring')
+    parser.add_argument('--companies-file', help='File with one Trustpilot review page URL per line')
+    parser.add_argument('--state', default=CONFIG['default_state_file'],
+                        help=f'File storing the schedule and seen reviews (default: {CONFIG["default_state_file"]})')
+    parser.add_argument('--sink', default=CONFIG['default_sink'],
+                        help=f'Where new reviews are written: a .jsonl file or a .db SQLite file (default: {CONFIG["default_sink"]})')
+    parser.add_argument('--once', action='store_true',
+                        help='Poll the companies that are due once and exit')
+    parser.add_argument('--emit-baseline', action='store_true',
+                        help="Also write the reviews found on a company's first poll to the sink")
+    parser.add_argument('--min-interval', type=int,
+                        help=f'Minimum seconds between polls of a company (default: {CONFIG["min_poll_interval"]})')
+    parser.add_argument('--max-interval', type=int,
+                        help=f'Maximum seconds between polls of a company (default: {CONFIG["max_poll_interval"]})')
+
+    # Debug configuration arguments
+    debug_group = parser.add_argument_group('Debug Options')
+    debug_group.add_argument('--debug', action='store_true',
+                            help='Enable debug mode (verbose output and HTML saving)')
+    debug_group.add_argument('--debug-html-path', type=str,
+                            help='Path to save debug HTML (default: debug_page.html)')
+
+    # Performance tuning arguments
+    perf_group = parser.add_argument_group('Performance Options')
+    perf_group.add_argument('--page-load-timeout', type=int,
+                           help='Timeout for page loading in seconds (default: 15)')
+    perf_group.add_argument('--retry-delay', type=int,
+                           help='Delay between retries in seconds (default: 2)')
+    perf_group.add_argument('--page-delay', type=int,
+                           help='Delay between pages in seconds (default: 2)')
+    perf_group.add_argument('--max-retries', type=int,
+                           help='Maximum number of retries per page (default: 3)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    update_config_from_args(args)
+    if args.min_interval:
+        CONFIG['min_poll_interval'] = args.min_interval
+    if args.max_interval:
+        CONFIG['max_poll_interval'] = args.max_interval
+
+    urls = list(args.urls)
+    if args.companies_file:
+        with open(args.companies_file, 'r', encoding='utf-8') as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+    conn = open_state(args.state)
+    sink = open_sink(args.sink)
+    try:
+        add_companies(conn, urls)
+        run_monitor(conn, sink, args.once, args.emit_baseline)
+    except KeyboardInterrupt:
+        print("\nStopping monitor")
+    finally:
+        print_summary(conn)
+        sink.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import argparse
+import os
+import re
+import sqlite3
+from datetime import date, timedelta, timezone
+from trustpilot_scraper import get_review_id, load_reviews_json, parse_published_date
+
+# Configuration parameters
+CONFIG = {
+    # Index settings
+    'default_index_file': 'reviews_index.db',
+    'indexed_fields': ['title', 'text', 'company_response'],
+
+    # Search settings
+    'default_limit': 20,
+    'snippet_length': 160,
+
+    # SQLite settings
+    'max_query_variables': 900  # Keep IN (...) lists under SQLite's variable limit
+}
+
+TOKEN_PATTERN = re.compile(r'\w+')
+QUERY_TOKEN_PATTERN = re.compile(r'-?"[^"]*"|\(|\)|[^\s()"]+')
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def open_index(index_file):
+    """Open (and create if needed) the on-disk inverted index"""
+    conn = sqlite3.connect(index_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sources (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            review_count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS reviews (
+            review_id TEXT PRIMARY KEY,
+            stars INTEGER,
+            published TEXT,
+            title TEXT,
+            text TEXT,
+            company_response TEXT,
+            reviewer_name TEXT,
+            source_file TEXT
+        );
+        -- Postings are clustered by term and carry stars/dates so filters
+        -- can be applied without touching the reviews table
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL,
+            review_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            stars INTEGER,
+            published TEXT,
+            positions TEXT NOT NULL,
+            PRIMARY KEY (term, review_id, field)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS reviews_published ON reviews (published);
+    """)
+    return conn
+
+def normalize_published(date_str):
+    """Normalize a published date to a sortable UTC ISO string ('' if it can't be parsed)"""
+    dt = parse_published_date(date_str)
+    if dt is None:
+        return ''
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def index_file(conn, path, force=False):
+    """Add the reviews from one JSON output file to the index.
+
+    Files that have already been indexed and haven't changed since are skipped,
+    and reviews already present in the index (by review ID) are not re-indexed,
+    so re-running over a growing directory of scrape outputs only adds new reviews.
+    Returns the number of newly indexed reviews.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    row = conn.execute("SELECT mtime, size FROM sources WHERE path = ?", (path,)).fetchone()
+    if row and not force and row[0] == stat.st_mtime and row[1] == stat.st_size:
+        print(f"Skipping {path} (already indexed)")
+        return 0
+
+    reviews = load_reviews_json(path)
+    added = 0
+    with conn:
+        for review in reviews:
+            review_id = get_review_id(review)
+            published = normalize_published(review.get('date', {}).get('published', ''))
+            stars = review.get('stars')
+
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (review_id, stars, published, review.get('title', ''), review.get('text', ''),
+                 review.get('company_response', ''), review.get('reviewer', {}).get('name', ''), path))
+            if cursor.rowcount == 0:
+                continue  # Already indexed from an earlier file
+
+            postings = []
+            for field in CONFIG['indexed_fields']:
+                positions = {}
+                for position, token in enumerate(tokenize(review.get(field, ''))):
+                    positions.setdefault(token, []).append(position)
+                for term, term_positions in positions.items():
+                    postings.append((term, review_id, field, stars, published,
+                                     ','.join(map(str, term_positions))))
+            conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?, ?, ?, ?)", postings)
+            added += 1
+
+        conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                     (path, stat.st_mtime, stat.st_size, len(reviews)))
+
+    print(f"Indexed {added} new reviews from {path} ({len(reviews) - added} already indexed)")
+    return added
+
+def parse_query(query):
+    """Parse a search query into a tree of ('and'|'or', [nodes]), ('not', node) and ('phrase', [terms]).
+
+    Supports bare terms (implicitly ANDed), "quoted phrases", AND, OR, NOT,
+    a leading '-' for negation and parentheses for grouping.
+    """
+    tokens = QUERY_TOKEN_PATTERN.findall(query)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def parse_or():
+        nonlocal position
+        nodes = [parse_and()]
+        while peek() == 'OR':
+            position += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nonlocal position
+        nodes = []
+        while peek() not in (None, ')', 'OR'):
+            if peek() == 'AND':
+                position += 1
+                continue
+            nodes.append(parse_unary())
+        if not nodes:
+            raise ValueError(f"Expected a search term in query: {query!r}")
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_phrase(token, text):
+        # Quoted phrases and terms that tokenize into several words (e.g. "e-mail") are phrases
+        terms = tokenize(text.strip('"'))
+        if not terms:
+            raise ValueError(f"Empty search term {token!r} in query: {query!r}")
+        return ('phrase', terms)
+
+    def parse_unary():
+        nonlocal position
+        token = peek()
+        if token in (None, ')', 'OR', 'AND'):
+            raise ValueError(f"Expected a search term in query: {query!r}")
+        position += 1
+        if token == 'NOT':
+            return ('not', parse_unary())
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError(f"Unbalanced parentheses in query: {query!r}")
+            position += 1
+            return node
+        if token.startswith('-'):
+            return ('not', parse_phrase(token, token[1:]))
+        return parse_phrase(token, token)
+
+    tree = parse_or()
+    if peek() is not None:
+        raise ValueError(f"Unexpected {peek()!r} in query: {query!r}")
+    return tree
+
+class IndexSearcher:
+    """Evaluates parsed queries against the index with optional star and date filters"""
+
+    def __init__(self, conn, stars=None, since=None, until=None):
+        self.conn = conn
+        self.filter_sql = ''
+        self.filter_params = []
+        if stars:
+            self.filter_sql += f" AND stars IN ({','.join('?' * len(stars))})"
+            self.filter_params.extend(stars)
+        if since or until:
+            # Undated reviews are stored as '', which would otherwise sort before any 'until' bound
+            self.filter_sql += " AND published != ''"
+        if since:
+            self.filter_sql += " AND published >= ?"
+            self.filter_params.append(since.isoformat())
+        if until:
+            # Inclusive of the whole 'until' day
+            self.filter_sql += " AND published < ?"
+            self.filter_params.append((until + timedelta(days=1)).isoformat())
+        self._universe = None
+
+    def universe(self):
+        """All review IDs that pass the filters (only needed for negations)"""
+        if self._universe is None:
+            rows = self.conn.execute("SELECT review_id FROM reviews WHERE 1=1" + self.filter_sql,
+                                     self.filter_params)
+            self._universe = {row[0] for row in rows}
+        return self._universe
+
+    def term_positions(self, term):
+        """Return {(review_id, field): set(positions)} for a term"""
+        rows = self.conn.execute(
+            "SELECT review_id, field, positions FROM postings WHERE term = ?" + self.filter_sql,
+            [term] + self.filter_params)
+        return {(review_id, field): set(map(int, positions.split(','))) for review_id, field, positions in rows}
+
+    def match_phrase(self, terms):
+        """Return the review IDs containing all terms consecutively in the same field"""
+        if not terms:
+            return set()
+        candidates = self.term_positions(terms[0])
+        for offset, term in enumerate(terms[1:], start=1):
+            if not candidates:
+                break
+            next_positions = self.term_positions(term)
+            matched = {}
+            for key, starts in candidates.items():
+                positions = next_positions.get(key)
+                if positions:
+                    remaining = {start for start in starts if start + offset in positions}
+                    if remaining:
+                        matched[key] = remaining
+            candidates = matched
+        return {review_id for review_id, _ in candidates}
+
+    def evaluate(self, node):
+        """Return the set of review IDs matching a parsed query node"""
+        kind = node[0]
+        if kind == 'phrase':
+            return self.match_phrase(node[1])
+        if kind == 'not':
+            return self.universe() - self.evaluate(node[1])
+        if kind == 'or':
+            result = set()
+            for child in node[1]:
+                result |= self.evaluate(child)
+            return result
+
+        # AND: intersect the positive terms first, then subtract the negated ones
+        positives = [child for child in node[1] if child[0] != 'not']
+        negatives = [child[1] for child in node[1] if child[0] == 'not']
+        result = None
+        for child in positives:
+            matches = self.evaluate(child)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        if result is None:
+            result = set(self.universe())
+        for child in negatives:
+            result -= self.evaluate(child)
+        return result
+
+    def fetch_reviews(self, review_ids, limit=None):
+        """Fetch matching reviews, newest first"""
+        review_ids = list(review_ids)
+        rows = []
+        for i in range(0, len(review_ids), CONFIG['max_query_variables']):
+            chunk = review_ids[i:i + CONFIG['max_query_variables']]
+            rows.extend(self.conn.execute(
+                f"SELECT review_id, stars, published, title, text, reviewer_name, source_file "
+                f"FROM reviews WHERE review_id IN ({','.join('?' * len(chunk))})", chunk))
+        rows.sort(key=lambda row: row[2] or '', reverse=True)
+        return rows[:limit] if limit else rows
+
+def search(index_file, query, stars=None, since=None, until=None, limit=None):
+    """Search the index and return (total matches, list of review rows)"""
+    conn = open_index(index_file)
+    try:
+        searcher = IndexSearcher(conn, stars, since, until)
+        review_ids = searcher.evaluate(parse_query(query))
+        return len(review_ids), searcher.fetch_reviews(review_ids, limit)
+    finally:
+        conn.close()
+
+def make_snippet(text, terms):
+    """Return a short excerpt of the text around the first matching term"""
+    length = CONFIG['snippet_length']
+    lowered = text.lower()
+    start = 0
+    for term in terms:
+        match = re.search(r'\b' + re.escape(term) + r'\b', lowered)
+        if match:
+            start = max(0, match.start() - length // 4)
+            break
+    snippet = text[start:start + length].replace('\n', ' ')
+    return ('...' if start > 0 else '') + snippet + ('...' if start + length < len(text) else '')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build and search a full-text index of scraped Trustpilot reviews')
+    parser.add_argument('-x', '--index', default=CONFIG['default_index_file'],
+                        help=f'Index file (default: {CONFIG["default_index_file"]})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help='Add JSON review files to the index')
+    add_parser.add_argument('inputs', nargs='+', help='JSON files written by trustpilot_scraper.py')
+    add_parser.add_argument('--force', action='store_true',
+                            help='Re-read files even if they are unchanged since they were indexed')
+
+    search_parser = subparsers.add_parser('search', help='Search the index')
+    search_parser.add_argument('query',
+                               help='Search query, e.g. \'refund AND ("customer service" OR support) -scam\'')
+    search_parser.add_argument('-s', '--stars', type=int, nargs='+', choices=[1, 2, 3, 4, 5],
+                               help='Only return reviews with these star ratings')
+    search_parser.add_argument('--since', type=date.fromisoformat,
+                               help='Only return reviews published on or after this date (YYYY-MM-DD)')
+    search_parser.add_argument('--until', type=date.fromisoformat,
+                               help='Only return reviews published on or before this date (YYYY-MM-DD)')
+    search_parser.add_argument('-n', '--limit', type=int, default=CONFIG['default_limit'],
+                               help=f'Maximum number of results to show (default: {CONFIG["default_limit"]})')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.command == 'add':
+        conn = open_index(args.index)
+        try:
+            added = sum(index_file(conn, path, args.force) for path in args.inputs)
+            total = conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        finally:
+            conn.close()
+        print(f"Added {added} reviews; index now contains {total} reviews")
+        return
+
+    try:
+        total, rows = search(args.index, args.query, args.stars, args.since, args.until, args.limit)
+    except ValueError as e:
+        print(f"Invalid query: {e}")
+        return
+    terms = [term for term in tokenize(args.query) if term not in ('and', 'or', 'not')]
+    for review_id, stars, published, title, text, reviewer_name, source_file in rows:
+        print(f"[{review_id}] {stars} stars, {published or 'unknown date'}, {reviewer_name or 'Anonymous'}")
+        if title:
+            print(f"  {title}")
+        print(f"  {make_snippet(text or '', terms)}")
+        print(f"  ({source_file})")
+    print(f"Found {total} matching reviews" + (f", showing {len(rows)}" if len(rows) < total else ""))
+
+if __name__ == "__main__":
+    main()
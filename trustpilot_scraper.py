@@ -6,12 +6,17 @@ import re
 import csv
 import argparse
 import os
+import hashlib
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # Configuration parameters
 CONFIG = {
@@ -42,9 +47,112 @@ CONFIG = {
     # Pagination handling
     'empty_pages_before_stop': 3,  # Number of consecutive empty pages before stopping
     'force_continue_to_estimated_pages': True,  # Continue until we reach estimated page count
-    'min_reviews_last_page': 10  # If we find fewer than this number of reviews, assume we're on the last page
+    'min_reviews_last_page': 10,  # If we find fewer than this number of reviews, assume we're on the last page
+    
+    # Partitioned crawling
+    'partition_workers': 3,  # Number of star rating streams (browsers) crawled at once
+    
+    # Parquet output
+    'parquet_compression': 'zstd',
+    'parquet_row_group_size': 50000
 }
 
+class SelectorCache:
+    """Remembers which selector strategy worked last for each field.
+    
+    Each field has a chain of (name, strategy) pairs, where a strategy returns None
+    when it finds nothing. The strategy that worked last is tried first, and the
+    full chain is only tried when it misses, so stale primary selectors are only
+    paid for until a fallback has succeeded once.
+    
+    Create one per crawl (and browser) rather than sharing one between threads.
+    """
+    
+    def __init__(self):
+        self.preferred = {}  # Field -> name of the strategy that worked last
+        self.stats = {}  # Field -> {'hits': ..., 'misses': ...}
+    
+    def ordered(self, field, strategies):
+        """Return the strategies for a field with the preferred one first"""
+        preferred = self.preferred.get(field)
+        return sorted(strategies, key=lambda strategy: strategy[0] != preferred)
+    
+    def extract(self, field, strategies, target):
+        """Run the strategies for a field against target until one finds a value"""
+        stats = self.stats.setdefault(field, {'hits': 0, 'misses': 0})
+        for attempt, (name, strategy) in enumerate(self.ordered(field, strategies)):
+            try:
+                value = strategy(target)
+            except Exception as e:
+                if CONFIG['verbose']:
+                    print(f"Error extracting {field} with {name}: {e}")
+                value = None
+            if value is not None:
+                stats['hits' if attempt == 0 else 'misses'] += 1
+                self.preferred[field] = name
+                return value
+        stats['misses'] += 1
+        return None
+    
+    def print_summary(self):
+        """Print hit/miss counts and the currently preferred strategy per field"""
+        print("Selector strategy cache:")
+        for field, stats in self.stats.items():
+            print(f"  {field}: {stats['hits']} hits, {stats['misses']} misses "
+                  f"(using {self.preferred.get(field, 'none')})")
+
+def stars_from_rating_attribute(review_element):
+    """Read the star rating from the data-service-review-rating attribute"""
+    elements = review_element.find_elements(By.CSS_SELECTOR, "[data-service-review-rating]")
+    rating_text = elements[0].get_attribute("data-service-review-rating") if elements else None
+    return int(re.search(r'\d+', rating_text).group()) if rating_text else None
+
+def stars_from_aria_label(review_element):
+    """Read the star rating from the star-rating element's aria-label"""
+    elements = review_element.find_elements(By.CSS_SELECTOR, "div.star-rating")
+    rating_text = elements[0].get_attribute("aria-label") if elements else None
+    return int(re.search(r'\d+', rating_text).group()) if rating_text else None
+
+def stars_from_star_images(review_element):
+    """Count the filled star images"""
+    star_images = review_element.find_elements(By.CSS_SELECTOR, "img.star-rating__star")
+    if not star_images:
+        return None
+    return len([img for img in star_images if "filled" in img.get_attribute("alt").lower()])
+
+def published_from_time_element(review_element):
+    """Read the published date from the datetime attribute of the time element"""
+    elements = review_element.find_elements(By.CSS_SELECTOR, "time")
+    return (elements[0].get_attribute("datetime") or None) if elements else None
+
+def published_from_date_attribute(review_element):
+    """Read the published date from data-service-review-date-time-ago (possibly in a different format)"""
+    elements = review_element.find_elements(By.CSS_SELECTOR, "[data-service-review-date-time-ago]")
+    return (elements[0].get_attribute("data-service-review-date-time-ago") or None) if elements else None
+
+STAR_STRATEGIES = [
+    ('[data-service-review-rating]', stars_from_rating_attribute),
+    ('div.star-rating', stars_from_aria_label),
+    ('img.star-rating__star', stars_from_star_images)
+]
+
+PUBLISHED_DATE_STRATEGIES = [
+    ('time', published_from_time_element),
+    ('[data-service-review-date-time-ago]', published_from_date_attribute)
+]
+
+# Review containers, as (name, locator); find_elements returns [] rather than raising
+REVIEW_CONTAINER_LOCATORS = [
+    ('article', (By.TAG_NAME, "article")),
+    ('div.styles_reviewCard__hcAvl', (By.CSS_SELECTOR, "div.styles_reviewCard__hcAvl")),
+    ('div.review-card', (By.CSS_SELECTOR, "div.review-card"))
+]
+
+REVIEW_CONTAINER_STRATEGIES = [
+    (name, lambda driver, locator=locator: driver.find_elements(*locator) or None)
+    for name, locator in REVIEW_CONTAINER_LOCATORS
+]
+
 # Function to update config from command line arguments
 def update_config_from_args(args):
     """Update the CONFIG dictionary based on command line arguments"""
@@ -67,105 +175,426 @@ def update_config_from_args(args):
     
     if args.max_retries:
         CONFIG['max_retries'] = args.max_retries
-
-def get_reviews_with_selenium(url, star_filter=None, max_pages=None):
-    """Extract reviews from Trustpilot using Selenium (for JavaScript rendered content)"""
-    
-    all_reviews = []
-    page_num = 1
-    max_retries = CONFIG['max_retries']
-    last_page_reached = False
-    highest_page_seen = 1
-    reviews_by_page = {}  # Track reviews found on each page for debugging
-    consecutive_empty_pages = 0  # Track consecutive pages with no reviews
-    estimated_total_pages = 0  # Will be calculated from total_reviews
     
+    if getattr(args, 'partition_workers', None):
+        CONFIG['partition_workers'] = args.partition_workers
+
+def create_driver():
+    """Create a headless Chrome driver configured from CONFIG"""
     # Set up Chrome options
     chrome_options = Options()
     for option in CONFIG['chrome_options']:
         chrome_options.add_argument(option)
     
     # Initialize the driver
-    driver = webdriver.Chrome(options=chrome_options)
+    return webdriver.Chrome(options=chrome_options)
+
+def quit_driver(driver):
+    """Quit a driver, ignoring errors from a browser that has already died"""
+    try:
+        driver.quit()
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error quitting browser: {e}")
+
+def build_page_url(base_url, page_num):
+    """Construct the URL of a given reviews page - ensure we're using the right format"""
+    if '?' in base_url:
+        if 'page=' in base_url:
+            # Replace existing page parameter
+            return re.sub(r'page=\d+', f'page={page_num}', base_url)
+        # Add page parameter
+        return f"{base_url}&page={page_num}"
+    return f"{base_url}?page={page_num}"
+
+def detect_total_reviews(driver):
+    """Detect the total review count and page count from the currently loaded reviews page.
+    
+    Returns (total_reviews, estimated_total_pages, highest_page_seen), where the first
+    two are 0 if they couldn't be determined.
+    """
+    total_reviews = 0
+    estimated_total_pages = 0
+    highest_page_seen = 1
     
     try:
-        # First, load the main page to get total review count and calculate total pages
-        main_url = url.split('?')[0] if '?' in url else url
-        base_url = url
+        # Wait for page to load
+        WebDriverWait(driver, CONFIG['page_load_timeout']).until(
+            EC.presence_of_element_located((By.TAG_NAME, "article"))
+        )
+        
+        # Try to find the total review count
+        total_reviews_element = driver.find_elements(By.CSS_SELECTOR, ".typography_body-l, .typography_heading-s, span[data-reviews-count-typography]")
+        total_reviews = 0
+        
+        # First try to find the review count from the main page
+        for element in total_reviews_element:
+            try:
+                text = element.text.strip()
+                if "review" in text.lower():
+                    # Try to extract the number from formats like "371 reviews" or "371 total reviews"
+                    matches = re.search(r'(\d[\d,]+)', text)
+                    if matches:
+                        # Remove commas and convert to int
+                        total_reviews = int(matches.group(1).replace(',', ''))
+                        print(f"Found total reviews from main page: {total_reviews}")
+                        break
+            except Exception as e:
+                if CONFIG['verbose']:
+                    print(f"Error parsing review count text: {e}")
         
-        driver.get(main_url)
+        # If not found in text, look for specific attribute
+        if total_reviews == 0:
+            try:
+                count_elements = driver.find_elements(By.CSS_SELECTOR, "[data-service-review-count], [data-reviews-count-typography]")
+                for elem in count_elements:
+                    data_count = elem.get_attribute("data-service-review-count")
+                    if data_count and data_count.isdigit():
+                        total_reviews = int(data_count)
+                        print(f"Found total reviews from data attribute: {total_reviews}")
+                        break
+            except Exception as e:
+                if CONFIG['verbose']:
+                    print(f"Error extracting review count from data attribute: {e}")
+                    
+        if total_reviews:
+            # Calculate estimated pages based on reviews per page
+            estimated_total_pages = (total_reviews + CONFIG['reviews_per_page'] - 1) // CONFIG['reviews_per_page']
+            print(f"Found approximately {total_reviews} total reviews across ~{estimated_total_pages} pages")
+        else:
+            print("Couldn't determine total review count, will iterate until no more pages are found")
+            
+        # Try to find the maximum page number from pagination
         try:
-            # Wait for page to load
-            WebDriverWait(driver, CONFIG['page_load_timeout']).until(
-                EC.presence_of_element_located((By.TAG_NAME, "article"))
-            )
+            pagination_elements = driver.find_elements(By.CSS_SELECTOR, "nav[aria-label='Pagination'] button, nav[aria-label='Pagination'] a, button[data-pagination-button-page], a[data-pagination-button-page]")
+            max_page = 1
+            for element in pagination_elements:
+                text = element.text.strip()
+                if text.isdigit():
+                    page_num_int = int(text)
+                    if page_num_int > max_page:
+                        max_page = page_num_int
             
-            # Try to find the total review count
-            total_reviews_element = driver.find_elements(By.CSS_SELECTOR, ".typography_body-l, .typography_heading-s, span[data-reviews-count-typography]")
-            total_reviews = 0
+            if max_page > 1:
+                print(f"Detected {max_page} pages in pagination")
+                highest_page_seen = max_page
+                
+                # If we found pagination but couldn't determine total reviews, estimate based on highest page seen
+                if total_reviews == 0:
+                    estimated_total_pages = max_page
+                    total_reviews = estimated_total_pages * CONFIG['reviews_per_page']
+                    print(f"Estimating {total_reviews} total reviews from highest visible page number ({max_page})")
+        except Exception as e:
+            print(f"Error detecting max pages from pagination: {e}")
+                
+    except Exception as e:
+        print(f"Error determining total pages: {e}")
+    
+    return total_reviews, estimated_total_pages, highest_page_seen
+
+def load_page(driver, selector_cache, page_url, page_num):
+    """Load a reviews page with retry logic.
+    
+    Returns 'loaded' once reviews are present, 'not_found' if we reached a 404 page,
+    or 'failed' if the page didn't load within the configured number of retries.
+    """
+    retry_count = 0
+    
+    while retry_count < CONFIG['max_retries']:
+        try:
+            driver.get(page_url)
             
-            # First try to find the review count from the main page
-            for element in total_reviews_element:
-                try:
-                    text = element.text.strip()
-                    if "review" in text.lower():
-                        # Try to extract the number from formats like "371 reviews" or "371 total reviews"
-                        matches = re.search(r'(\d[\d,]+)', text)
-                        if matches:
-                            # Remove commas and convert to int
-                            total_reviews = int(matches.group(1).replace(',', ''))
-                            print(f"Found total reviews from main page: {total_reviews}")
-                            break
-                except Exception as e:
-                    if CONFIG['verbose']:
-                        print(f"Error parsing review count text: {e}")
+            # Check for 404 page
+            if "404" in driver.title or "Whoops" in driver.title:
+                print(f"Reached a 404 error page. Stopping at page {page_num-1}.")
+                return 'not_found'
             
-            # If not found in text, look for specific attribute
-            if total_reviews == 0:
+            # Wait for content to load - try the container that matched last time first
+            locators = [locator for _, locator in selector_cache.ordered('review_elements', REVIEW_CONTAINER_LOCATORS)]
+            try:
+                WebDriverWait(driver, CONFIG['page_load_timeout']).until(
+                    EC.presence_of_element_located(locators[0])
+                )
+                return 'loaded'
+            except TimeoutException:
                 try:
-                    count_elements = driver.find_elements(By.CSS_SELECTOR, "[data-service-review-count], [data-reviews-count-typography]")
-                    for elem in count_elements:
-                        data_count = elem.get_attribute("data-service-review-count")
-                        if data_count and data_count.isdigit():
-                            total_reviews = int(data_count)
-                            print(f"Found total reviews from data attribute: {total_reviews}")
-                            break
-                except Exception as e:
-                    if CONFIG['verbose']:
-                        print(f"Error extracting review count from data attribute: {e}")
+                    WebDriverWait(driver, CONFIG['page_load_timeout'] - 5).until(
+                        EC.presence_of_element_located(locators[1])
+                    )
+                    return 'loaded'
+                except TimeoutException:
+                    # Check for 404 page again after timeout
+                    if "404" in driver.title or "Whoops" in driver.title:
+                        print(f"Reached a 404 error page after timeout. Stopping at page {page_num-1}.")
+                        return 'not_found'
                         
-            if total_reviews:
-                # Calculate estimated pages based on reviews per page
-                estimated_total_pages = (total_reviews + CONFIG['reviews_per_page'] - 1) // CONFIG['reviews_per_page']
-                print(f"Found approximately {total_reviews} total reviews across ~{estimated_total_pages} pages")
-            else:
-                print("Couldn't determine total review count, will iterate until no more pages are found")
-                
-            # Try to find the maximum page number from pagination
-            try:
-                pagination_elements = driver.find_elements(By.CSS_SELECTOR, "nav[aria-label='Pagination'] button, nav[aria-label='Pagination'] a, button[data-pagination-button-page], a[data-pagination-button-page]")
-                max_page = 1
-                for element in pagination_elements:
-                    text = element.text.strip()
-                    if text.isdigit():
-                        page_num_int = int(text)
-                        if page_num_int > max_page:
-                            max_page = page_num_int
-                
-                if max_page > 1:
-                    print(f"Detected {max_page} pages in pagination")
-                    highest_page_seen = max_page
-                    
-                    # If we found pagination but couldn't determine total reviews, estimate based on highest page seen
-                    if total_reviews == 0:
-                        estimated_total_pages = max_page
-                        total_reviews = estimated_total_pages * CONFIG['reviews_per_page']
-                        print(f"Estimating {total_reviews} total reviews from highest visible page number ({max_page})")
-            except Exception as e:
-                print(f"Error detecting max pages from pagination: {e}")
-                
+                    print(f"Timeout waiting for page {page_num} to load, retrying...")
+                    retry_count += 1
+                    time.sleep(CONFIG['retry_delay'])  # Wait before retry
+        
+        except Exception as e:
+            print(f"Error loading page {page_num}: {e}")
+            retry_count += 1
+            time.sleep(CONFIG['retry_delay'])  # Wait before retry
+    
+    return 'failed'
+
+def find_review_elements(driver, selector_cache):
+    """Find the review elements on the currently loaded page"""
+    # Try different possible selectors, starting with the one that worked last
+    return selector_cache.extract('review_elements', REVIEW_CONTAINER_STRATEGIES, driver) or []
+
+def extract_review(review_element, selector_cache, page_num, source_url, star_filter=None):
+    """Extract a review from a review element.
+    
+    The star rating is extracted first so reviews outside star_filter can be
+    skipped without extracting the rest; None is returned for those.
+    """
+    # Create a comprehensive review object
+    review = {
+        'stars': None,
+        'title': '',
+        'text': '',
+        'company_response': '',
+        'reviewer': {
+            'name': '',
+            'location': '',
+            'reviews_count': None,
+        },
+        'date': {
+            'published': '',
+            'experience': ''
+        },
+        'metadata': {
+            'verified': False,
+            'useful_votes': 0,
+            'page_number': page_num,
+            'source_url': source_url
+        }
+    }
+    
+    # Extract star rating
+    review['stars'] = selector_cache.extract('stars', STAR_STRATEGIES, review_element)
+
+    # Skip if not in the requested star filter
+    if star_filter and review['stars'] not in star_filter:
+        return None
+        
+    # Extract review title
+    try:
+        title_element = review_element.find_element(By.CSS_SELECTOR, "h2[data-service-review-title-typography], .review-content__title, .typography_heading-s")
+        review['title'] = title_element.text.strip()
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting title: {e}")
+        
+    # Extract review text
+    try:
+        review_content = review_element.find_element(By.CSS_SELECTOR, "p[data-service-review-text-typography], p.review-content__text, .typography_body-l")
+        review['text'] = review_content.text.strip()
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting review text: {e}")
+    
+    # Extract company response
+    try:
+        response_element = review_element.find_element(By.CSS_SELECTOR, "div.review-business-reply, div[data-service-review-business-response]")
+        response_text = response_element.text.strip()
+        # Clean up the response
+        if "Reply from" in response_text:
+            parts = response_text.split("Reply from", 1)
+            reply_from = parts[1].split("\n", 1)[0].strip() if len(parts) > 1 else ""
+            actual_response = parts[1].split("\n", 1)[1].strip() if len(parts) > 1 and "\n" in parts[1] else parts[1].strip()
+            review['company_response'] = actual_response
+            review['metadata']['company_reply_name'] = reply_from
+        else:
+            review['company_response'] = response_text
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting company response: {e}")
+    
+    # Extract reviewer name and location
+    try:
+        reviewer_element = review_element.find_element(By.CSS_SELECTOR, "span.typography_heading-xxs, .consumer-information__name")
+        review['reviewer']['name'] = reviewer_element.text.strip()
+        
+        try:
+            location_element = review_element.find_element(By.CSS_SELECTOR, ".consumer-information__location")
+            review['reviewer']['location'] = location_element.text.strip()
+        except Exception as e:
+            if CONFIG['verbose']:
+                print(f"Error extracting reviewer location: {e}")
+            
+        # Extract review count if available
+        try:
+            reviews_count_element = review_element.find_element(By.CSS_SELECTOR, ".consumer-information__review-count")
+            count_text = reviews_count_element.text.strip()
+            count_match = re.search(r'(\d+)', count_text)
+            if count_match:
+                review['reviewer']['reviews_count'] = int(count_match.group(1))
+        except Exception as e:
+            if CONFIG['verbose']:
+                print(f"Error extracting reviewer count: {e}")
+            
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting reviewer info: {e}")
+        review['reviewer']['name'] = "Anonymous"
+        
+    # Extract review date (published)
+    published = selector_cache.extract('date_published', PUBLISHED_DATE_STRATEGIES, review_element)
+    if published:
+        review['date']['published'] = published
+    elif CONFIG['verbose']:
+        print("Error extracting review date: no date element found")
+        
+    # Extract experience date if available
+    try:
+        exp_date_elements = review_element.find_elements(By.CSS_SELECTOR, ".review-content-header__dates")
+        for elem in exp_date_elements:
+            if "Date of experience" in elem.text:
+                exp_date_text = elem.text.replace("Date of experience:", "").strip()
+                review['date']['experience'] = exp_date_text
+                break
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting experience date: {e}")
+    
+    # Extract verification status
+    try:
+        verified_elements = review_element.find_elements(By.CSS_SELECTOR, ".review-content-header__verification")
+        review['metadata']['verified'] = len(verified_elements) > 0 and "verified" in verified_elements[0].text.lower()
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting verification status: {e}")
+        
+    # Extract useful/helpful votes
+    try:
+        votes_elements = review_element.find_elements(By.CSS_SELECTOR, ".useful-count")
+        if votes_elements:
+            votes_text = votes_elements[0].text.strip()
+            votes_match = re.search(r'(\d+)', votes_text)
+            if votes_match:
+                review['metadata']['useful_votes'] = int(votes_match.group(1))
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting useful votes: {e}")
+        
+    # Extract any tags/categories
+    try:
+        tags_elements = review_element.find_elements(By.CSS_SELECTOR, ".review-tag")
+        if tags_elements:
+            review['metadata']['tags'] = [tag.text.strip() for tag in tags_elements]
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error extracting tags: {e}")
+    
+    return review
+
+def scrape_page(driver, selector_cache, base_url, page_num, star_filter=None, page_stats=None):
+    """Load a single reviews page and extract its reviews.
+    
+    Returns (status, reviews) where status is 'loaded', 'not_found' (a 404 page, a
+    redirect or a "no reviews" message, meaning we've gone beyond the last page) or
+    'failed'. If page_stats is given, it is filled in with the number of review
+    elements found ('raw_elements') and how many were 'extracted', 'filtered' or
+    failed with 'errors'.
+    """
+    if page_stats is None:
+        page_stats = {}
+    page_stats.update({'raw_elements': 0, 'extracted': 0, 'filtered': 0, 'errors': 0})
+    
+    page_status = load_page(driver, selector_cache, build_page_url(base_url, page_num), page_num)
+    if page_status != 'loaded':
+        return page_status, []
+    
+    # Save HTML for debugging (first page only)
+    if page_num == 1 and CONFIG['save_debug_html']:
+        with open(CONFIG['debug_html_path'], "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        print(f"Saved first page HTML to {CONFIG['debug_html_path']} for inspection")
+    
+    # Check for "no reviews found" message that indicates we've gone too far
+    try:
+        no_results = driver.find_elements(By.CSS_SELECTOR, 
+                                      "p.typography_body-l:contains('No reviews matching'), div.noResultsContainer, div:contains('No reviews found')")
+        if no_results:
+            print(f"Found 'No reviews' message on page {page_num}")
+            return 'not_found', []
+    except Exception as e:
+        if CONFIG['verbose']:
+            print(f"Error checking for no results: {e}")
+    
+    # Detect if we've been redirected to another page (indicating we've gone beyond the last page)
+    current_url = driver.current_url
+    url_page_match = re.search(r'page=(\d+)', current_url)
+    if url_page_match:
+        actual_page = int(url_page_match.group(1))
+        if actual_page != page_num:
+            print(f"Requested page {page_num} but got redirected to page {actual_page} - we've likely gone beyond the last page")
+            return 'not_found', []
+    
+    review_elements = find_review_elements(driver, selector_cache)
+    page_stats['raw_elements'] = len(review_elements)
+    
+    reviews = []
+    for review_element in review_elements:
+        try:
+            review = extract_review(review_element, selector_cache, page_num, current_url, star_filter)
         except Exception as e:
-            print(f"Error determining total pages: {e}")
+            print(f"Error extracting review data: {e}")
+            page_stats['errors'] += 1
+            continue
+        
+        # Skip if not in the requested star filter
+        if review is None:
+            page_stats['filtered'] += 1
+            continue
+        
+        # Only keep reviews with text or a star rating
+        if review['text'] or review['stars']:
+            reviews.append(review)
+            page_stats['extracted'] += 1
+            if CONFIG['verbose']:
+                print(f"Extracted review: {review['stars']} stars, {len(review['text'])} chars")
+        else:
+            page_stats['filtered'] += 1
+            if CONFIG['verbose']:
+                print(f"Skipping review - no text or star rating")
+    
+    return 'loaded', reviews
+
+def get_reviews_with_selenium(url, star_filter=None, max_pages=None, total_reviews=None):
+    """Extract reviews from Trustpilot using Selenium (for JavaScript rendered content)
+    
+    If total_reviews is already known (e.g. when planning a partitioned crawl),
+    the initial page load used to detect it is skipped; pass 0 to skip detection
+    when the count is unknown.
+    """
+    
+    all_reviews = []
+    page_num = 1
+    max_retries = CONFIG['max_retries']
+    last_page_reached = False
+    highest_page_seen = 1
+    reviews_by_page = {}  # Track reviews found on each page for debugging
+    consecutive_empty_pages = 0  # Track consecutive pages with no reviews
+    estimated_total_pages = 0  # Will be calculated from total_reviews
+    
+    driver = create_driver()
+    # Kept for the whole crawl, so a strategy learned on one page is tried first on the next
+    selector_cache = SelectorCache()
+    
+    try:
+        main_url = url.split('?')[0] if '?' in url else url
+        base_url = url
+        
+        if total_reviews is None:
+            # First, load the main page to get total review count and calculate total pages
+            driver.get(main_url)
+            total_reviews, estimated_total_pages, highest_page_seen = detect_total_reviews(driver)
+        else:
+            estimated_total_pages = (total_reviews + CONFIG['reviews_per_page'] - 1) // CONFIG['reviews_per_page']
         
         # Now iterate through all pages with direct URL access
         while not last_page_reached:
@@ -178,353 +607,67 @@ def get_reviews_with_selenium(url, star_filter=None, max_pages=None):
                 print(f"Detected 404 page after page {page_num-1}. Stopping scraping.")
                 break
             
-            # Construct page URL - ensure we're using the right format
-            if '?' in base_url:
-                if 'page=' in base_url:
-                    # Replace existing page parameter
-                    page_url = re.sub(r'page=\d+', f'page={page_num}', base_url)
-                else:
-                    # Add page parameter
-                    page_url = f"{base_url}&page={page_num}"
-            else:
-                page_url = f"{base_url}?page={page_num}"
-                
+            page_url = build_page_url(base_url, page_num)
             print(f"Scraping page {page_num}: {page_url}")
             
-            # Load the page with retry logic
-            retry_count = 0
-            page_loaded = False
-            
-            while retry_count < max_retries and not page_loaded:
-                try:
-                    driver.get(page_url)
-                    
-                    # Check for 404 page
-                    if "404" in driver.title or "Whoops" in driver.title:
-                        print(f"Reached a 404 error page. Stopping at page {page_num-1}.")
-                        last_page_reached = True
-                        break
-                    
-                    # Wait for content to load - try multiple selectors
-                    try:
-                        WebDriverWait(driver, CONFIG['page_load_timeout']).until(
-                            EC.presence_of_element_located((By.TAG_NAME, "article"))
-                        )
-                        page_loaded = True
-                    except TimeoutException:
-                        try:
-                            WebDriverWait(driver, CONFIG['page_load_timeout'] - 5).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, "div.styles_reviewCard__hcAvl"))
-                            )
-                            page_loaded = True
-                        except TimeoutException:
-                            # Check for 404 page again after timeout
-                            if "404" in driver.title or "Whoops" in driver.title:
-                                print(f"Reached a 404 error page after timeout. Stopping at page {page_num-1}.")
-                                last_page_reached = True
-                                break
-                                
-                            print(f"Timeout waiting for page {page_num} to load, retrying...")
-                            retry_count += 1
-                            time.sleep(CONFIG['retry_delay'])  # Wait before retry
-                
-                except Exception as e:
-                    print(f"Error loading page {page_num}: {e}")
-                    retry_count += 1
-                    time.sleep(CONFIG['retry_delay'])  # Wait before retry
-            
-            # If we've hit a 404 page, stop
-            if last_page_reached:
-                break
-                
-            if not page_loaded:
-                print(f"Failed to load page {page_num} after {max_retries} attempts")
+            # Load the page with retry logic and extract its reviews
+            page_stats = {}
+            try:
+                page_status, page_reviews = scrape_page(driver, selector_cache, base_url, page_num,
+                                                        star_filter, page_stats)
+            except Exception as e:
+                print(f"Error finding reviews: {e}")
                 consecutive_empty_pages += 1
                 if consecutive_empty_pages >= CONFIG['empty_pages_before_stop']:
-                    print(f"Stopping after {consecutive_empty_pages} consecutive failed page loads")
+                    print(f"Stopping after {consecutive_empty_pages} consecutive error pages")
                     break
                 page_num += 1
                 continue
-                
-            # Save HTML for debugging (first page only)
-            if page_num == 1 and CONFIG['save_debug_html']:
-                with open(CONFIG['debug_html_path'], "w", encoding="utf-8") as f:
-                    f.write(driver.page_source)
-                print(f"Saved first page HTML to {CONFIG['debug_html_path']} for inspection")
-            
-            # Check for "no reviews found" message that indicates we've gone too far
-            try:
-                no_results = driver.find_elements(By.CSS_SELECTOR, 
-                                              "p.typography_body-l:contains('No reviews matching'), div.noResultsContainer, div:contains('No reviews found')")
-                if no_results:
-                    print(f"Found 'No reviews' message on page {page_num}")
-                    last_page_reached = True
-                    break
-            except Exception as e:
-                if CONFIG['verbose']:
-                    print(f"Error checking for no results: {e}")
             
-            # Detect if we've been redirected to another page (indicating we've gone beyond the last page)
-            current_url = driver.current_url
-            url_page_match = re.search(r'page=(\d+)', current_url)
-            if url_page_match:
-                actual_page = int(url_page_match.group(1))
-                if actual_page != page_num:
-                    print(f"Requested page {page_num} but got redirected to page {actual_page} - we've likely gone beyond the last page")
-                    last_page_reached = True
-                    break
-                
-            # Find all reviews
-            try:
-                # Try different possible selectors
-                review_elements = driver.find_elements(By.TAG_NAME, "article")
-                
-                if not review_elements:
-                    print("No reviews found with article tag. Trying alternative selectors...")
-                    review_elements = driver.find_elements(By.CSS_SELECTOR, "div.styles_reviewCard__hcAvl")
-                
-                if not review_elements:
-                    review_elements = driver.find_elements(By.CSS_SELECTOR, "div.review-card")
-                
-                if not review_elements:
-                    print("No reviews found on this page. This may be the last page.")
-                    last_page_reached = True
-                    break
-                
-                # If we're on a page that has fewer reviews than expected, we're likely on the last page
-                if len(review_elements) < CONFIG['reviews_per_page'] and page_num > 1:
-                    print(f"Found only {len(review_elements)} reviews on page {page_num} (fewer than standard {CONFIG['reviews_per_page']})")
-                    print(f"This indicates we're on the last page of reviews")
-                    last_page_reached = True
-                
-                print(f"Found {len(review_elements)} review elements on page {page_num}")
-                
-                # Initialize page stats
-                reviews_by_page[page_num] = {
-                    'raw_elements': len(review_elements),
-                    'extracted': 0,
-                    'filtered': 0,
-                    'errors': 0
-                }
-                
-                # Process each review element
-                for review_element in review_elements:
-                    try:
-                        # Create a comprehensive review object
-                        review = {
-                            'stars': None,
-                            'title': '',
-                            'text': '',
-                            'company_response': '',
-                            'reviewer': {
-                                'name': '',
-                                'location': '',
-                                'reviews_count': None,
-                            },
-                            'date': {
-                                'published': '',
-                                'experience': ''
-                            },
-                            'metadata': {
-                                'verified': False,
-                                'useful_votes': 0,
-                                'page_number': page_num,
-                                'source_url': current_url
-                            }
-                        }
-                        
-                        # Extract star rating
-                        try:
-                            # Try finding the rating from data attributes
-                            rating_element = review_element.find_element(By.CSS_SELECTOR, "[data-service-review-rating]")
-                            rating_text = rating_element.get_attribute("data-service-review-rating")
-                            star_rating = int(re.search(r'\d+', rating_text).group()) if rating_text else None
-                            review['stars'] = star_rating
-                        except:
-                            # Try finding from star images
-                            try:
-                                stars_element = review_element.find_element(By.CSS_SELECTOR, "div.star-rating")
-                                rating_text = stars_element.get_attribute("aria-label")
-                                star_rating = int(re.search(r'\d+', rating_text).group()) if rating_text else None
-                                review['stars'] = star_rating
-                            except:
-                                # Try one more way to find stars (look for the star images)
-                                try:
-                                    star_images = review_element.find_elements(By.CSS_SELECTOR, "img.star-rating__star")
-                                    if star_images:
-                                        filled_stars = [img for img in star_images if "filled" in img.get_attribute("alt").lower()]
-                                        review['stars'] = len(filled_stars)
-                                except:
-                                    pass
-                        
-                        # Skip if not in the requested star filter
-                        if star_filter and review['stars'] not in star_filter:
-                            reviews_by_page[page_num]['filtered'] += 1
-                            continue
-                            
-                        # Extract review title
-                        try:
-                            title_element = review_element.find_element(By.CSS_SELECTOR, "h2[data-service-review-title-typography], .review-content__title, .typography_heading-s")
-                            review['title'] = title_element.text.strip()
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting title: {e}")
-                            
-                        # Extract review text
-                        try:
-                            review_content = review_element.find_element(By.CSS_SELECTOR, "p[data-service-review-text-typography], p.review-content__text, .typography_body-l")
-                            review['text'] = review_content.text.strip()
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting review text: {e}")
-                        
-                        # Extract company response
-                        try:
-                            response_element = review_element.find_element(By.CSS_SELECTOR, "div.review-business-reply, div[data-service-review-business-response]")
-                            response_text = response_element.text.strip()
-                            # Clean up the response
-                            if "Reply from" in response_text:
-                                parts = response_text.split("Reply from", 1)
-                                reply_from = parts[1].split("\n", 1)[0].strip() if len(parts) > 1 else ""
-                                actual_response = parts[1].split("\n", 1)[1].strip() if len(parts) > 1 and "\n" in parts[1] else parts[1].strip()
-                                review['company_response'] = actual_response
-                                review['metadata']['company_reply_name'] = reply_from
-                            else:
-                                review['company_response'] = response_text
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting company response: {e}")
-                        
-                        # Extract reviewer name and location
-                        try:
-                            reviewer_element = review_element.find_element(By.CSS_SELECTOR, "span.typography_heading-xxs, .consumer-information__name")
-                            review['reviewer']['name'] = reviewer_element.text.strip()
-                            
-                            try:
-                                location_element = review_element.find_element(By.CSS_SELECTOR, ".consumer-information__location")
-                                review['reviewer']['location'] = location_element.text.strip()
-                            except Exception as e:
-                                if CONFIG['verbose']:
-                                    print(f"Error extracting reviewer location: {e}")
-                                
-                            # Extract review count if available
-                            try:
-                                reviews_count_element = review_element.find_element(By.CSS_SELECTOR, ".consumer-information__review-count")
-                                count_text = reviews_count_element.text.strip()
-                                count_match = re.search(r'(\d+)', count_text)
-                                if count_match:
-                                    review['reviewer']['reviews_count'] = int(count_match.group(1))
-                            except Exception as e:
-                                if CONFIG['verbose']:
-                                    print(f"Error extracting reviewer count: {e}")
-                                
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting reviewer info: {e}")
-                            review['reviewer']['name'] = "Anonymous"
-                            
-                        # Extract review date (published)
-                        try:
-                            date_element = review_element.find_element(By.CSS_SELECTOR, "time")
-                            review['date']['published'] = date_element.get_attribute("datetime")
-                        except Exception as e:
-                            # Try an alternative way to get the date
-                            try:
-                                # Look for date text in a more general way
-                                date_elements = review_element.find_elements(By.CSS_SELECTOR, "[data-service-review-date-time-ago]")
-                                if date_elements:
-                                    date_attr = date_elements[0].get_attribute("data-service-review-date-time-ago")
-                                    if date_attr:
-                                        # Date might be in a different format, but we'll store it as is
-                                        review['date']['published'] = date_attr
-                            except:
-                                pass
-                                
-                            if CONFIG['verbose']:
-                                print(f"Error extracting review date: {e}")
-                            
-                        # Extract experience date if available
-                        try:
-                            exp_date_elements = review_element.find_elements(By.CSS_SELECTOR, ".review-content-header__dates")
-                            for elem in exp_date_elements:
-                                if "Date of experience" in elem.text:
-                                    exp_date_text = elem.text.replace("Date of experience:", "").strip()
-                                    review['date']['experience'] = exp_date_text
-                                    break
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting experience date: {e}")
-                        
-                        # Extract verification status
-                        try:
-                            verified_elements = review_element.find_elements(By.CSS_SELECTOR, ".review-content-header__verification")
-                            review['metadata']['verified'] = len(verified_elements) > 0 and "verified" in verified_elements[0].text.lower()
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting verification status: {e}")
-                            
-                        # Extract useful/helpful votes
-                        try:
-                            votes_elements = review_element.find_elements(By.CSS_SELECTOR, ".useful-count")
-                            if votes_elements:
-                                votes_text = votes_elements[0].text.strip()
-                                votes_match = re.search(r'(\d+)', votes_text)
-                                if votes_match:
-                                    review['metadata']['useful_votes'] = int(votes_match.group(1))
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting useful votes: {e}")
-                            
-                        # Extract any tags/categories
-                        try:
-                            tags_elements = review_element.find_elements(By.CSS_SELECTOR, ".review-tag")
-                            if tags_elements:
-                                review['metadata']['tags'] = [tag.text.strip() for tag in tags_elements]
-                        except Exception as e:
-                            if CONFIG['verbose']:
-                                print(f"Error extracting tags: {e}")
-                        
-                        # Only add reviews with text or a star rating
-                        if review['text'] or review['stars']:
-                            all_reviews.append(review)
-                            reviews_by_page[page_num]['extracted'] += 1
-                            if CONFIG['verbose']:
-                                print(f"Extracted review: {review['stars']} stars, {len(review['text'])} chars")
-                        else:
-                            reviews_by_page[page_num]['filtered'] += 1
-                            if CONFIG['verbose']:
-                                print(f"Skipping review - no text or star rating")
-                    
-                    except Exception as e:
-                        print(f"Error extracting review data: {e}")
-                        reviews_by_page[page_num]['errors'] += 1
-                
-                # Report page stats
-                print(f"Page {page_num} summary: found {reviews_by_page[page_num]['raw_elements']} elements, "
-                      f"extracted {reviews_by_page[page_num]['extracted']} reviews, "
-                      f"filtered {reviews_by_page[page_num]['filtered']}, "
-                      f"errors {reviews_by_page[page_num]['errors']}")
-                
-                # If we got no reviews on this page (but found review elements), something's wrong
-                if reviews_by_page[page_num]['extracted'] == 0 and reviews_by_page[page_num]['raw_elements'] > 0:
-                    print("WARNING: Found review elements but couldn't extract any valid reviews.")
-                    if page_num == 1:
-                        print("This is the first page, so there might be a problem with the page structure.")
-                        print("Check the HTML content in debug_page.html")
-                
-                # If this is the last page, break out
-                if last_page_reached:
-                    break
+            # If we've hit a 404 page or gone beyond the last page, stop
+            if page_status == 'not_found':
+                break
                 
-            except Exception as e:
-                print(f"Error finding reviews: {e}")
+            if page_status == 'failed':
+                print(f"Failed to load page {page_num} after {max_retries} attempts")
                 consecutive_empty_pages += 1
                 if consecutive_empty_pages >= CONFIG['empty_pages_before_stop']:
-                    print(f"Stopping after {consecutive_empty_pages} consecutive error pages")
+                    print(f"Stopping after {consecutive_empty_pages} consecutive failed page loads")
                     break
                 page_num += 1
                 continue
             
+            if not page_stats['raw_elements']:
+                print("No reviews found on this page. This may be the last page.")
+                break
+            
+            # If we're on a page that has fewer reviews than expected, we're likely on the last page
+            if page_stats['raw_elements'] < CONFIG['reviews_per_page'] and page_num > 1:
+                print(f"Found only {page_stats['raw_elements']} reviews on page {page_num} (fewer than standard {CONFIG['reviews_per_page']})")
+                print(f"This indicates we're on the last page of reviews")
+                last_page_reached = True
+            
+            print(f"Found {page_stats['raw_elements']} review elements on page {page_num}")
+            reviews_by_page[page_num] = page_stats
+            all_reviews.extend(page_reviews)
+            
+            # Report page stats
+            print(f"Page {page_num} summary: found {page_stats['raw_elements']} elements, "
+                  f"extracted {page_stats['extracted']} reviews, "
+                  f"filtered {page_stats['filtered']}, "
+                  f"errors {page_stats['errors']}")
+            
+            # If we got no reviews on this page (but found review elements), something's wrong
+            if page_stats['extracted'] == 0 and page_stats['raw_elements'] > 0:
+                print("WARNING: Found review elements but couldn't extract any valid reviews.")
+                if page_num == 1:
+                    print("This is the first page, so there might be a problem with the page structure.")
+                    print("Check the HTML content in debug_page.html")
+            
+            # If this is the last page, break out
+            if last_page_reached:
+                break
+            
             # Move to the next page
             page_num += 1
             # print(f"Moving to page {page_num}")
@@ -565,6 +708,7 @@ def get_reviews_with_selenium(url, star_filter=None, max_pages=None):
     print(f"Total review elements found: {raw_elements_total}")
     print(f"Total reviews filtered out: {filtered_total}")
     print(f"Total extraction errors: {errors_total}")
+    selector_cache.print_summary()
     
     if len(all_reviews) < raw_elements_total - filtered_total:
         print(f"WARNING: Expected {raw_elements_total - filtered_total} reviews but only extracted {len(all_reviews)}")
@@ -572,11 +716,129 @@ def get_reviews_with_selenium(url, star_filter=None, max_pages=None):
     
     return all_reviews
 
+def detect_star_distribution(driver):
+    """Read the percentage of reviews per star rating from the rating distribution rows.
+    
+    Returns a dict of star -> percentage for the rows that could be read.
+    """
+    star_names = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5}
+    distribution = {}
+    for row in driver.find_elements(By.CSS_SELECTOR, "[data-star-rating]"):
+        try:
+            rating = row.get_attribute("data-star-rating").strip().lower()
+            star = star_names.get(rating) or (int(rating) if rating.isdigit() else None)
+            percentage_elements = row.find_elements(By.CSS_SELECTOR, "[data-rating-distribution-row-percentage-typography]")
+            text = percentage_elements[0].text if percentage_elements else row.text
+            matches = re.search(r'(<?)\s*(\d+)\s*%', text)
+            if star and matches:
+                # "<1%" still means some reviews
+                distribution[star] = max(int(matches.group(2)), 1 if matches.group(1) else 0)
+        except Exception as e:
+            if CONFIG['verbose']:
+                print(f"Error parsing rating distribution row: {e}")
+    return distribution
+
+def plan_star_partitions(url, star_filter=None):
+    """Estimate the review count of each star rating facet of a company.
+    
+    The counts come from the company's total and the percentages in its rating
+    distribution, rounded up to an upper bound so no pages are cut off (the crawl
+    of a facet still stops at its last page). Star filters already in the URL are
+    used when star_filter isn't given.
+    
+    Returns a list of (star, facet_url, total_reviews) where total_reviews is 0
+    if the count couldn't be estimated.
+    """
+    if not star_filter:
+        star_filter = [int(star) for star in re.findall(r'stars=(\d)', url)]
+    # Strip any existing star filters so each facet only has its own
+    base_url = re.sub(r'stars=\d&?', '', url).rstrip('?&')
+    stars = sorted(set(star_filter)) if star_filter else [1, 2, 3, 4, 5]
+    
+    driver = create_driver()
+    try:
+        print(f"Checking review counts per star rating: {base_url}")
+        driver.get(base_url)
+        company_total, estimated_total_pages, highest_page_seen = detect_total_reviews(driver)
+        distribution = detect_star_distribution(driver)
+    finally:
+        driver.quit()
+    
+    partitions = []
+    for star in stars:
+        facet_url = add_star_filter_to_url(base_url, [star])
+        total_reviews = 0
+        if company_total and star in distribution:
+            # The percentages are rounded, so allow one more percentage point
+            share = min(distribution[star] + 1, 100)
+            total_reviews = (company_total * share + 99) // 100
+        partitions.append((star, facet_url, total_reviews))
+    return partitions
+
+def get_reviews_partitioned(url, star_filter=None, max_pages=None):
+    """Crawl each star rating as its own filtered page sequence, concurrently.
+    
+    Each facet is a shorter, independent pagination sequence planned from an upper
+    bound of its own review count, so the streams can run in parallel and stay within pagination
+    depth limits. The results are merged and deduplicated by review ID.
+    """
+    partitions = plan_star_partitions(url, star_filter)
+    
+    def crawl_partition(partition):
+        star, facet_url, total_reviews = partition
+        facet_pages = max_pages
+        if total_reviews:
+            planned_pages = (total_reviews + CONFIG['reviews_per_page'] - 1) // CONFIG['reviews_per_page']
+            facet_pages = min(planned_pages, max_pages) if max_pages else planned_pages
+        print(f"Crawling {star}-star reviews: {f'up to {total_reviews}' if total_reviews else 'unknown number of'} reviews, "
+              f"{facet_pages or 'all'} pages")
+        # The facet URL already filters server-side; the star filter only guards against stray reviews.
+        # An unknown count is passed as 0 so the stream doesn't detect it from the unfiltered company page
+        return star, get_reviews_with_selenium(facet_url, [star], facet_pages, total_reviews)
+    
+    with ThreadPoolExecutor(max_workers=CONFIG['partition_workers']) as executor:
+        results = list(executor.map(crawl_partition, partitions))
+    
+    # Merge the streams, dropping reviews seen in more than one stream
+    all_reviews = []
+    seen_ids = set()
+    for star, reviews in results:
+        for review in reviews:
+            review_id = get_review_id(review)
+            if review_id not in seen_ids:
+                seen_ids.add(review_id)
+                all_reviews.append(review)
+    
+    # Most recent first, like Trustpilot's default ordering
+    all_reviews.sort(key=lambda review: review['date']['published'] or '', reverse=True)
+    
+    print(f"\n--- PARTITIONED CRAWL SUMMARY ---")
+    for (star, facet_url, total_reviews), (_, reviews) in zip(partitions, results):
+        print(f"{star}-star: extracted {len(reviews)} of {f'at most {total_reviews}' if total_reviews else 'unknown'} reviews")
+    print(f"Total unique reviews: {len(all_reviews)}")
+    return all_reviews
+
 def get_reviews(url, star_filter=None, max_pages=None):
     """Legacy function that uses requests+BeautifulSoup. Now we use Selenium."""
     # print("Using Selenium...")
     return get_reviews_with_selenium(url, star_filter, max_pages)
 
+def get_review_id(review):
+    """Return a stable identifier for a review, derived from the reviewer, publish date, title and text"""
+    key = '\x1f'.join([
+        review.get('reviewer', {}).get('name', '') or '',
+        review.get('date', {}).get('published', '') or '',
+        review.get('title', '') or '',
+        review.get('text', '') or ''
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]
+
+def load_reviews_json(filename):
+    """Load the list of reviews from a JSON file written by save_reviews_json"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['reviews']
+
 def save_reviews_json(reviews, filename):
     """Save reviews to a JSON file with indentation for readability"""
     with open(filename, 'w', encoding='utf-8') as f:
@@ -590,6 +852,32 @@ def save_reviews_json(reviews, filename):
         }, f, ensure_ascii=False, indent=2)
     print(f"Saved {len(reviews)} reviews to {filename}")
 
+def flatten_review(review):
+    """Flatten a nested review dictionary into a single-level row"""
+    return {
+        'stars': review.get('stars'),
+        'title': review.get('title', ''),
+        'text': review.get('text', ''),
+        'company_response': review.get('company_response', ''),
+        'reviewer_name': review.get('reviewer', {}).get('name', ''),
+        'reviewer_location': review.get('reviewer', {}).get('location', ''),
+        'reviewer_reviews_count': review.get('reviewer', {}).get('reviews_count'),
+        'date_published': review.get('date', {}).get('published', ''),
+        'date_experience': review.get('date', {}).get('experience', ''),
+        'verified': review.get('metadata', {}).get('verified', False),
+        'useful_votes': review.get('metadata', {}).get('useful_votes', 0),
+        'page_number': review.get('metadata', {}).get('page_number')
+    }
+
+def parse_published_date(date_str):
+    """Parse an ISO published date into a datetime, returning None if it can't be parsed"""
+    if not date_str:
+        return None
+    try:
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
 def save_reviews_csv(reviews, filename):
     """Save reviews to a CSV file with flattened structure"""
     with open(filename, 'w', encoding='utf-8', newline='') as f:
@@ -608,24 +896,56 @@ def save_reviews_csv(reviews, filename):
         
         # Write the data - flatten the nested structure
         for review in reviews:
-            flat_review = {
-                'stars': review.get('stars'),
-                'title': review.get('title', ''),
-                'text': review.get('text', ''),
-                'company_response': review.get('company_response', ''),
-                'reviewer_name': review.get('reviewer', {}).get('name', ''),
-                'reviewer_location': review.get('reviewer', {}).get('location', ''),
-                'reviewer_reviews_count': review.get('reviewer', {}).get('reviews_count'),
-                'date_published': review.get('date', {}).get('published', ''),
-                'date_experience': review.get('date', {}).get('experience', ''),
-                'verified': review.get('metadata', {}).get('verified', False),
-                'useful_votes': review.get('metadata', {}).get('useful_votes', 0),
-                'page_number': review.get('metadata', {}).get('page_number')
-            }
-            writer.writerow(flat_review)
+            writer.writerow(flatten_review(review))
     
     print(f"Saved {len(reviews)} reviews to {filename}")
 
+def save_reviews_parquet(reviews, filename):
+    """Save reviews to a columnar Parquet file with the same columns as the CSV output.
+    
+    Stars and dates are stored as typed columns and the reviewer name/location
+    columns are dictionary encoded, so readers that only need a few columns
+    (e.g. gen_graph.py) can skip the review text entirely.
+    """
+    schema = pa.schema([
+        ('stars', pa.int8()),
+        ('title', pa.string()),
+        ('text', pa.string()),
+        ('company_response', pa.string()),
+        ('reviewer_name', pa.dictionary(pa.int32(), pa.string())),
+        ('reviewer_location', pa.dictionary(pa.int32(), pa.string())),
+        ('reviewer_reviews_count', pa.int32()),
+        ('date_published', pa.timestamp('ms', tz='UTC')),
+        ('date_experience', pa.string()),
+        ('verified', pa.bool_()),
+        ('useful_votes', pa.int32()),
+        ('page_number', pa.int32())
+    ], metadata={
+        'total_reviews': str(len(reviews)),
+        'extracted_date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'version': '2.0'
+    })
+    
+    # Build the columns from the same flattened rows used for CSV output
+    rows = [flatten_review(review) for review in reviews]
+    columns = {name: [row[name] for row in rows] for name in schema.names}
+    columns['date_published'] = [parse_published_date(value) for value in columns['date_published']]
+    
+    table = pa.table([pa.array(columns[field.name], type=field.type) for field in schema], schema=schema)
+    pq.write_table(table, filename,
+                   compression=CONFIG['parquet_compression'],
+                   row_group_size=CONFIG['parquet_row_group_size'])
+    print(f"Saved {len(reviews)} reviews to {filename}")
+
+def add_star_filter_to_url(url, stars):
+    """Add stars= filters to a reviews URL unless it already has some"""
+    if 'stars=' in url or not stars:
+        return url
+    stars_param = '&'.join([f'stars={star}' for star in stars])
+    if '?' in url:
+        return f"{url}&{stars_param}"
+    return f"{url}?{stars_param}"
+
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description='Scrape reviews from Trustpilot')
@@ -636,8 +956,8 @@ def parse_arguments():
     # Optional arguments
     parser.add_argument('-o', '--output', default='trustpilot_reviews.json', 
                         help='Output file path (default: trustpilot_reviews.json)')
-    parser.add_argument('-f', '--format', choices=['json', 'csv'], default='json',
-                        help='Output format: json or csv (default: json)')
+    parser.add_argument('-f', '--format', choices=['json', 'csv', 'parquet'], default='json',
+                        help='Output format: json, csv or parquet (default: json)')
     parser.add_argument('-s', '--stars', type=int, nargs='+', choices=[1, 2, 3, 4, 5],
                         help='Filter by star ratings (e.g., -s 1 4 5 for 1, 4, and 5 star reviews)')
     parser.add_argument('-p', '--max-pages', type=int,
@@ -662,6 +982,10 @@ def parse_arguments():
                            help='Delay between pages in seconds (default: 2)')
     perf_group.add_argument('--max-retries', type=int,
                            help='Maximum number of retries per page (default: 3)')
+    perf_group.add_argument('--partition-by-stars', action='store_true',
+                           help='Crawl each star rating as a separate, concurrent page sequence and merge the results')
+    perf_group.add_argument('--partition-workers', type=int,
+                           help='Number of star ratings crawled at once with --partition-by-stars (default: 3)')
     
     return parser.parse_args()
 
@@ -675,17 +999,13 @@ def main():
     # Get the URL
     url = args.url
     
-    # Check if stars are already in the URL
-    if not ('stars=' in url) and args.stars:
-        # Add star filter to URL if not already present
-        stars_param = '&'.join([f'stars={star}' for star in args.stars])
-        if '?' in url:
-            url += f'&{stars_param}'
-        else:
-            url += f'?{stars_param}'
-    
     # Get the reviews
-    reviews = get_reviews(url, args.stars, args.max_pages)
+    if args.partition_by_stars:
+        reviews = get_reviews_partitioned(url, args.stars, args.max_pages)
+    else:
+        # Add star filter to URL if not already present
+        url = add_star_filter_to_url(url, args.stars)
+        reviews = get_reviews(url, args.stars, args.max_pages)
     
     # Save the reviews in the specified format
     output_file = args.output
@@ -695,12 +1015,16 @@ def main():
         output_file = os.path.splitext(output_file)[0] + '.json'
     elif args.format == 'csv' and not output_file.endswith('.csv'):
         output_file = os.path.splitext(output_file)[0] + '.csv'
+    elif args.format == 'parquet' and not output_file.endswith('.parquet'):
+        output_file = os.path.splitext(output_file)[0] + '.parquet'
     
     # Save in the appropriate format
     if args.format == 'json':
         save_reviews_json(reviews, output_file)
-    else:  # csv
+    elif args.format == 'csv':
         save_reviews_csv(reviews, output_file)
+    else:  # parquet
+        save_reviews_parquet(reviews, output_file)
     
     print(f"Extracted {len(reviews)} reviews in total")
 
@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import time
+from trustpilot_scraper import (
+    CONFIG as SCRAPER_CONFIG, SelectorCache, add_star_filter_to_url, create_driver, detect_total_reviews,
+    get_review_id, quit_driver, save_reviews_csv, save_reviews_json, save_reviews_parquet, scrape_page,
+    update_config_from_args
+)
+
+# Configuration parameters
+CONFIG = {
+    # Queue settings
+    'default_queue_file': 'work_queue.db',
+    'lease_timeout': 300,  # Seconds before a leased task is handed to another worker
+    'max_attempts': 3,  # Attempts per page before it is marked as failed
+    'retry_backoff': 60,  # Seconds before a released page can be leased again
+    'poll_interval': 10,  # Seconds an idle worker waits before checking for tasks again
+    'busy_timeout': 30  # Seconds to wait for another process holding the SQLite write lock
+}
+
+def open_queue(queue_file):
+    """Open (and create if needed) the shared task queue"""
+    conn = sqlite3.connect(queue_file, timeout=CONFIG['busy_timeout'])
+    # WAL needs shared memory between processes on one host, so keep the rollback
+    # journal: it works for workers on several machines sharing the file
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            page_number INTEGER NOT NULL,
+            stars TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            result_count INTEGER,
+            UNIQUE (url, page_number, stars)
+        );
+        CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+        -- Results are keyed by review ID, so a page scraped twice (e.g. after a
+        -- worker's lease expired) doesn't produce duplicate reviews
+        CREATE TABLE IF NOT EXISTS results (
+            review_id TEXT PRIMARY KEY,
+            task_id INTEGER NOT NULL,
+            review TEXT NOT NULL
+        );
+    """)
+    return conn
+
+def enqueue_pages(conn, url, pages, stars=None):
+    """Add one task per page of a company's reviews; pages that are already queued are skipped"""
+    stars_key = json.dumps(sorted(stars)) if stars else ''
+    with conn:
+        cursor = conn.executemany(
+            "INSERT OR IGNORE INTO tasks (url, page_number, stars) VALUES (?, ?, ?)",
+            [(url, page_num, stars_key) for page_num in range(1, pages + 1)])
+    return cursor.rowcount
+
+def detect_page_count(url):
+    """Load the first reviews page and estimate how many pages there are"""
+    driver = create_driver()
+    try:
+        driver.get(url)
+        total_reviews, estimated_total_pages, highest_page_seen = detect_total_reviews(driver)
+    finally:
+        driver.quit()
+    return estimated_total_pages or highest_page_seen
+
+def lease_task(conn, worker_id):
+    """Atomically lease the next pending task (or one whose lease has expired).
+    
+    A released task keeps a lease_expires time while it is pending, which is when
+    its retry backoff ends; it isn't leased again before then.
+
+    Returns (task_id, url, page_number, stars) or None if there is nothing to do.
+    """
+    now = time.time()
+    with conn:
+        # Give up on pages that keep timing out their leases
+        conn.execute("UPDATE tasks SET status = 'failed' "
+                     "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                     (now, CONFIG['max_attempts']))
+        row = conn.execute(
+            """UPDATE tasks
+               SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+               WHERE task_id = (
+                   SELECT task_id FROM tasks
+                   WHERE (status = 'pending' AND (lease_expires IS NULL OR lease_expires < ?))
+                      OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY page_number, task_id
+                   LIMIT 1
+               )
+               RETURNING task_id, url, page_number, stars""",
+            (worker_id, now + CONFIG['lease_timeout'], now, now)).fetchone()
+    if row is None:
+        return None
+    task_id, url, page_number, stars_key = row
+    return task_id, url, page_number, json.loads(stars_key) if stars_key else None
+
+def complete_task(conn, task_id, worker_id, reviews):
+    """Store a page's reviews (deduplicated by review ID) and mark its task done.
+    
+    The results are always kept, but the task is only marked done if this worker
+    still holds its lease; a late worker whose lease was taken over leaves the
+    task to the worker that now holds it.
+    """
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO results VALUES (?, ?, ?)",
+                         [(get_review_id(review), task_id, json.dumps(review, ensure_ascii=False))
+                          for review in reviews])
+        conn.execute("UPDATE tasks SET status = 'done', result_count = ?, lease_owner = NULL, lease_expires = NULL "
+                     "WHERE task_id = ? AND status = 'leased' AND lease_owner = ?",
+                     (len(reviews), task_id, worker_id))
+
+def release_task(conn, task_id, worker_id, count_attempt=True):
+    """Return a failed task to the queue, or mark it failed once it has used all its attempts.
+    
+    The task can't be leased again until the retry backoff has passed. With
+    count_attempt=False (e.g. the browser died rather than the page failing) the
+    attempt is given back. Does nothing if this worker no longer holds the task's lease.
+    """
+    refund = 0 if count_attempt else 1
+    with conn:
+        conn.execute("UPDATE tasks SET status = CASE WHEN attempts - ? >= ? THEN 'failed' ELSE 'pending' END, "
+                     "attempts = attempts - ?, lease_owner = NULL, lease_expires = ? "
+                     "WHERE task_id = ? AND status = 'leased' AND lease_owner = ?",
+                     (refund, CONFIG['max_attempts'], refund, time.time() + CONFIG['retry_backoff'],
+                      task_id, worker_id))
+
+def requeue_failed(conn):
+    """Give failed tasks a fresh set of attempts; returns the number of tasks requeued"""
+    with conn:
+        cursor = conn.execute("UPDATE tasks SET status = 'pending', attempts = 0, lease_owner = NULL, "
+                              "lease_expires = NULL WHERE status = 'failed'")
+    return cursor.rowcount
+
+def browser_responds(driver):
+    """Check whether the browser still answers commands"""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def run_worker(queue_file, worker_id=None, exit_when_empty=False):
+    """Lease page tasks and scrape them until the queue is empty (or forever)"""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    conn = open_queue(queue_file)
+    driver = None
+    selector_cache = SelectorCache()
+    pages_done = 0
+    try:
+        while True:
+            task = lease_task(conn, worker_id)
+            if task is None:
+                if exit_when_empty:
+                    break
+                time.sleep(CONFIG['poll_interval'])
+                continue
+
+            task_id, url, page_num, stars = task
+            print(f"[{worker_id}] Scraping page {page_num} of {url}")
+            if driver is None:
+                driver = create_driver()
+            try:
+                status, reviews = scrape_page(driver, selector_cache, url, page_num, stars)
+            except Exception as e:
+                print(f"[{worker_id}] Error scraping page {page_num}: {e}")
+                status, reviews = 'failed', []
+
+            if status == 'failed':
+                # A dead browser isn't the page's fault, so it doesn't use up one of the page's attempts
+                release_task(conn, task_id, worker_id, count_attempt=browser_responds(driver))
+                # Start a fresh browser for the next page in case this one has died
+                quit_driver(driver)
+                driver = None
+                continue
+
+            # Pages beyond the last page complete with no reviews
+            complete_task(conn, task_id, worker_id, reviews)
+            pages_done += 1
+            print(f"[{worker_id}] Page {page_num}: {len(reviews)} reviews")
+            time.sleep(SCRAPER_CONFIG['page_delay'])  # Delay between pages to be polite
+    finally:
+        if driver is not None:
+            quit_driver(driver)
+        conn.close()
+    print(f"[{worker_id}] Finished after {pages_done} pages")
+    selector_cache.print_summary()
+
+def print_status(conn):
+    """Print task counts by status and the number of unique reviews collected"""
+    now = time.time()
+    for status, count in conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status ORDER BY status"):
+        print(f"{status}: {count}")
+    expired = conn.execute("SELECT COUNT(*) FROM tasks WHERE status = 'leased' AND lease_expires < ?",
+                           (now,)).fetchone()[0]
+    if expired:
+        print(f"({expired} leases have expired and will be retried)")
+    print(f"Unique reviews collected: {conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]}")
+
+def load_results(conn):
+    """Return all collected reviews in page order"""
+    rows = conn.execute("SELECT results.review FROM results JOIN tasks USING (task_id) "
+                        "ORDER BY tasks.url, tasks.page_number, results.rowid")
+    return [json.loads(row[0]) for row in rows]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Crawl Trustpilot reviews with a shared page work queue')
+    parser.add_argument('-q', '--queue', default=CONFIG['default_queue_file'],
+                        help=f'Queue file shared by the coordinator and workers (default: {CONFIG["default_queue_file"]})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Queue the pages of a company for scraping')
+    enqueue_parser.add_argument('url', help='URL of the Trustpilot reviews page')
+    enqueue_parser.add_argument('-s', '--stars', type=int, nargs='+', choices=[1, 2, 3, 4, 5],
+                                help='Filter by star ratings (e.g., -s 1 4 5)')
+    enqueue_parser.add_argument('-p', '--pages', type=int,
+                                help='Number of pages to queue (default: detected from the review count)')
+
+    worker_parser = subparsers.add_parser('worker', help='Scrape queued pages')
+    worker_parser.add_argument('--worker-id', help='Name used for leases (default: hostname-pid)')
+    worker_parser.add_argument('--exit-when-empty', action='store_true',
+                               help='Exit when there are no tasks left instead of waiting for more')
+    worker_parser.add_argument('--lease-timeout', type=int,
+                               help=f'Seconds before a leased page is retried by another worker (default: {CONFIG["lease_timeout"]})')
+    worker_parser.add_argument('--debug', action='store_true',
+                               help='Enable debug mode (verbose output and HTML saving)')
+    worker_parser.add_argument('--debug-html-path', type=str,
+                               help='Path to save debug HTML (default: debug_page.html)')
+    worker_parser.add_argument('--page-load-timeout', type=int,
+                               help='Timeout for page loading in seconds (default: 15)')
+    worker_parser.add_argument('--retry-delay', type=int,
+                               help='Delay between retries in seconds (default: 2)')
+    worker_parser.add_argument('--page-delay', type=int,
+                               help='Delay between pages in seconds (default: 2)')
+    worker_parser.add_argument('--max-retries', type=int,
+                               help='Maximum number of retries per page (default: 3)')
+
+    subparsers.add_parser('status', help='Show queue progress')
+    subparsers.add_parser('retry-failed', help='Put pages that used up their attempts back in the queue')
+
+    export_parser = subparsers.add_parser('export', help='Save the collected reviews')
+    export_parser.add_argument('-o', '--output', default='trustpilot_reviews.json',
+                               help='Output file path (default: trustpilot_reviews.json)')
+    export_parser.add_argument('-f', '--format', choices=['json', 'csv', 'parquet'], default='json',
+                               help='Output format: json, csv or parquet (default: json)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.command == 'enqueue':
+        url = add_star_filter_to_url(args.url, args.stars)
+        pages = args.pages or detect_page_count(url)
+        conn = open_queue(args.queue)
+        try:
+            added = enqueue_pages(conn, url, pages, args.stars)
+        finally:
+            conn.close()
+        print(f"Queued {added} new pages of {url} ({pages} pages requested)")
+
+    elif args.command == 'worker':
+        update_config_from_args(args)
+        if args.lease_timeout:
+            CONFIG['lease_timeout'] = args.lease_timeout
+        run_worker(args.queue, args.worker_id, args.exit_when_empty)
+
+    elif args.command == 'retry-failed':
+        conn = open_queue(args.queue)
+        try:
+            requeued = requeue_failed(conn)
+        finally:
+            conn.close()
+        print(f"Requeued {requeued} failed pages")
+
+    elif args.command == 'status':
+        conn = open_queue(args.queue)
+        try:
+            print_status(conn)
+        finally:
+            conn.close()
+
+    else:  # export
+        conn = open_queue(args.queue)
+        try:
+            reviews = load_results(conn)
+        finally:
+            conn.close()
+        output_file = os.path.splitext(args.output)[0] + '.' + args.format
+        if args.format == 'json':
+            save_reviews_json(reviews, output_file)
+        elif args.format == 'csv':
+            save_reviews_csv(reviews, output_file)
+        else:  # parquet
+            save_reviews_parquet(reviews, output_file)
+
+if __name__ == "__main__":
+    main()